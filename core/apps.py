@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from . import checks  # noqa: F401, registers the system checks
+        from .signals import connect_signals
+        connect_signals()
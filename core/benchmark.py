@@ -0,0 +1,352 @@
+"""
+Load test harness for the benchmark command.
+
+Requests are handed straight to the WSGI application in
+reReddit_backend/wsgi.py from a pool of threads, so the whole stack
+(middleware, authentication, views, the database) is measured without
+a server or the network in between. Each scenario is a list of calls
+built from what is in the database, e.g. after
+
+    manage.py generate_dataset --seed 1
+
+and run `requests` times at a fixed concurrency. The result is plain
+JSON with latency percentiles, throughput and database queries per
+request, so two runs (two commits) can be diffed with compare().
+"""
+import io
+import json
+import math
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.dataset import PASSWORD
+from feeds import popular
+from loanrequests.models import Loanrequest
+from redditors.models import User, UserSubMembership
+from savingrequests.models import Savingrequest
+from subs.models import Sub
+
+
+class Call:
+    """One HTTP request, turned into a fresh WSGI environ per run."""
+
+    def __init__(self, method, path, query=None, data=None, token=None):
+        self.method = method
+        self.path = path
+        self.query = urlencode(query or {})
+        self.body = json.dumps(data).encode() if data is not None else b''
+        self.token = token
+
+    def environ(self):
+        environ = {
+            'REQUEST_METHOD': self.method,
+            'PATH_INFO': self.path,
+            'QUERY_STRING': self.query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_ACCEPT': 'application/json',
+            'CONTENT_LENGTH': str(len(self.body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(self.body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if self.body:
+            environ['CONTENT_TYPE'] = 'application/json'
+        if self.token:
+            environ['HTTP_AUTHORIZATION'] = 'Token {}'.format(self.token)
+        return environ
+
+
+class QueryCounter:
+    """
+    Counts the queries of every database connection opened while it
+    is installed, including the ones of SearchView's own threads, so
+    queries per request is total queries / requests.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def add_wrapper(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            # first, so the execute_wrapper() blocks of middleware open
+            # at this point still pop their own wrappers
+            connection.execute_wrappers.insert(0, self)
+
+    def install(self):
+        # reopen this thread's connections so they get the wrapper too
+        connections.close_all()
+        connection_created.connect(
+            self.add_wrapper, weak=False, dispatch_uid='benchmark-query-counter'
+        )
+
+    def uninstall(self):
+        connection_created.disconnect(dispatch_uid='benchmark-query-counter')
+
+
+def percentile(ordered, pct):
+    """Nearest rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def send(application, call):
+    """Run one call through the application, (status, seconds)."""
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line[:3]))
+
+    started = time.perf_counter()
+    result = application(call.environ(), start_response)
+    try:
+        for _chunk in result:
+            pass
+    finally:
+        # sends request_finished, like a real server does
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0], time.perf_counter() - started
+
+
+def run_scenario(application, name, calls, requests, concurrency, counter, warmup=0):
+    jobs = [calls[i % len(calls)] for i in range(warmup + requests)]
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(lambda call: send(application, call), jobs[:warmup]))
+        queries = counter.count
+        started = time.perf_counter()
+        results = list(executor.map(lambda call: send(application, call), jobs[warmup:]))
+        duration = time.perf_counter() - started
+        queries = counter.count - queries
+
+    latencies = sorted(seconds * 1000 for _status, seconds in results)
+    statuses = Counter(status for status, _seconds in results)
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return OrderedDict((
+        ('name', name),
+        ('requests', requests),
+        ('concurrency', concurrency),
+        ('statuses', {str(code): count for code, count in sorted(statuses.items())}),
+        ('errors', sum(count for code, count in statuses.items() if code >= 400)),
+        ('duration_s', rounded(duration)),
+        ('throughput_rps', rounded(requests / duration if duration else 0)),
+        ('latency_ms', OrderedDict((
+            ('mean', rounded(sum(latencies) / len(latencies) if latencies else None)),
+            ('p50', rounded(percentile(latencies, 50))),
+            ('p95', rounded(percentile(latencies, 95))),
+            ('p99', rounded(percentile(latencies, 99))),
+            ('max', rounded(latencies[-1] if latencies else None)),
+        ))),
+        ('queries_per_request', rounded(queries / requests if requests else 0)),
+    ))
+
+
+def build_scenarios(seed=0, sample=50):
+    """
+    name -> list of calls, picked with a seeded random.Random from the
+    users, subs and titles in the database. Users log in with the
+    password generate_dataset gives them and post to a sub they are a
+    member of.
+    """
+    rng = random.Random(seed)
+    member_pks = list(
+        UserSubMembership.objects.order_by('user_id')
+        .values_list('user_id', flat=True).distinct()
+    )
+    user_pks = rng.sample(member_pks, min(sample, len(member_pks)))
+    users = list(User.objects.filter(pk__in=user_pks).order_by('pk'))
+    tokens = dict(Token.objects.filter(user__in=user_pks).values_list('user_id', 'key'))
+    sub_of = {}
+    for user_pk, title in UserSubMembership.objects.filter(
+            user__in=user_pks).order_by('user_id', 'sub_id').values_list('user_id', 'sub__title'):
+        sub_of.setdefault(user_pk, title)
+    titles = list(Sub.objects.order_by('-memberscount', 'pk').values_list('title', flat=True)[:sample])
+    words = sorted({
+        word.lower().strip('.')
+        for title in Loanrequest.objects.order_by('-pk').values_list('title', flat=True)[:sample]
+        for word in title.split()
+        if len(word) > 3
+    })
+    if not users or not titles or not words:
+        raise ValueError(
+            "The database has no users with subs or no loanrequests, "
+            "run generate_dataset first."
+        )
+
+    def post(kind, amount_field):
+        return [
+            Call('POST', '/{}/create/{}/'.format(kind, sub_of[user.pk]), data={
+                'title': 'Benchmark {} {}'.format(kind, index),
+                'body': 'Posted by the benchmark.',
+                amount_field: rng.randint(100, 10000),
+            }, token=tokens.get(user.pk))
+            for index, user in enumerate(users)
+        ]
+
+    scenarios = OrderedDict()
+    scenarios['loanrequest-list'] = [Call('GET', '/loanrequests/')] + [
+        Call('GET', '/loanrequests/', query={'ordering': ordering})
+        for ordering in ('-created', 'created')
+    ]
+    scenarios['sub-loanrequest-list'] = [
+        Call('GET', '/loanrequests/subreddit-list/{}/'.format(title))
+        for title in titles
+    ]
+    scenarios['sub-loanrequest-list-home'] = [
+        Call('GET', '/loanrequests/subreddit-list/home/', token=tokens.get(user.pk))
+        for user in users
+    ]
+    scenarios['sub-loanrequest-list-all'] = [
+        Call('GET', '/loanrequests/subreddit-list/all/')
+    ]
+    scenarios['sub-loanrequest-list-popular'] = [
+        Call('GET', '/loanrequests/subreddit-list/popular/', query={'pagination': 'cursor'})
+    ]
+    scenarios['sub-mixed-feed'] = [
+        Call('GET', '/feeds/subreddit-list/{}/'.format(title)) for title in titles
+    ]
+    scenarios['search'] = [
+        Call('GET', '/search/', query={'q': word}) for word in rng.sample(words, min(sample, len(words)))
+    ]
+    scenarios['user-login'] = [
+        Call('POST', '/users/login/', data={'username': user.username, 'password': PASSWORD})
+        for user in users
+    ]
+    scenarios['user-profile'] = [
+        Call('GET', '/users/profile/{}/'.format(user.username)) for user in users
+    ]
+    scenarios['create-loanrequest'] = post('loanrequests', 'loanamount')
+    scenarios['create-savingrequest'] = post('savingrequests', 'savingamount')
+    return scenarios
+
+
+def feed_plans(seed=0, ordering=('-created', '-pk')):
+    """
+    EXPLAIN output of the first page of the sub, author, home and all
+    feeds in the newest first ordering and of 'popular', for the user
+    and sub a seeded random.Random picks, so index changes show up in
+    the report.
+    """
+    rng = random.Random(seed)
+    pairs = list(UserSubMembership.objects.order_by('pk').values_list('user_id', 'sub_id')[:1000])
+    if not pairs:
+        return OrderedDict()
+    user_pk, sub_pk = rng.choice(pairs)
+    user = User.objects.get(pk=user_pk)
+    plans = OrderedDict()
+    for model in (Loanrequest, Savingrequest):
+        queryset = model.objects.with_related().order_by(*ordering)
+        feeds = (
+            ('sub', queryset.filter(subreddit=sub_pk)),
+            ('author', queryset.filter(authorsender=user_pk)),
+            ('home', queryset.filter(subreddit__in=user.subs.get_queryset().order_by('pk'))),
+            ('all', queryset),
+            ('popular', queryset.order_by(*popular.ORDERING)),
+        )
+        for name, feed in feeds:
+            key = '{}-{}'.format(model._meta.model_name, name)
+            plans[key] = feed[:10].explain().splitlines()
+    return plans
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=str(settings.BASE_DIR),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(application, scenarios, requests=200, concurrency=4, warmup=10,
+                  progress=None):
+    counter = QueryCounter()
+    counter.install()
+    try:
+        results = []
+        for name, calls in scenarios.items():
+            result = run_scenario(
+                application, name, calls, requests, concurrency, counter, warmup
+            )
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    finally:
+        counter.uninstall()
+    return OrderedDict((
+        ('commit', get_commit()),
+        ('created', timezone.now().isoformat()),
+        ('database', connection.vendor),
+        # DEBUG keeps every query in memory, numbers are not comparable
+        ('debug', settings.DEBUG),
+        ('scenarios', results),
+    ))
+
+
+def compare(baseline, current, tolerance=0.1):
+    """
+    (scenario, metric, before, after, regressed) rows for the
+    scenarios both runs have. p95 latency or queries per request going
+    up, or throughput going down, by more than `tolerance` is a
+    regression.
+    """
+    before = {result['name']: result for result in baseline['scenarios']}
+    rows = []
+    for result in current['scenarios']:
+        old = before.get(result['name'])
+        if old is None:
+            continue
+        for metric, higher_is_worse in (('p95', True), ('throughput_rps', False),
+                                        ('queries_per_request', True)):
+            if metric == 'p95':
+                was, now = old['latency_ms']['p95'], result['latency_ms']['p95']
+            else:
+                was, now = old[metric], result[metric]
+            if higher_is_worse:
+                regressed = now > was * (1 + tolerance) and now - was > 0.5
+            else:
+                regressed = now < was * (1 - tolerance)
+            rows.append((result['name'], metric, was, now, regressed))
+    return rows
+
+
+def changed_plans(baseline, current):
+    """(name, before, after) for the feed plans that differ."""
+    before = baseline.get('plans') or {}
+    return [
+        (name, before[name], plan)
+        for name, plan in (current.get('plans') or {}).items()
+        if name in before and before[name] != plan
+    ]
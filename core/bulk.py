@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.utils.translation import gettext as _
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from redditors.models import User, UserSubMembership
+from subs.models import Sub
+from utilities.bulk import bulk_create_with_pks
+
+
+class BulkLookups:
+    """
+    Users, subs and memberships referenced by a whole batch, each
+    fetched with one query instead of per item.
+    """
+
+    def __init__(self, usernames, titles):
+        self.users = {
+            user.username: user
+            for user in User.objects.filter(username__in=usernames)
+        }
+        self.subs = {
+            sub.title: sub
+            for sub in Sub.objects.filter(title__in=titles)
+        }
+        self.memberships = set(UserSubMembership.objects.filter(
+            user__in=[user.pk for user in self.users.values()],
+            sub__in=[sub.pk for sub in self.subs.values()]
+        ).values_list('user_id', 'sub_id'))
+
+
+class BulkRequestItemSerializer(serializers.ModelSerializer):
+    """
+    One item of a bulk create. Does the same checks as the regular
+    Loanrequest/Savingrequest serializers but against the BulkLookups
+    in the context instead of the database.
+    The author defaults to the caller.
+    """
+    subreddit = serializers.CharField()
+    authorsender = serializers.CharField(required=False)
+
+    request_name = 'request'
+
+    def validate(self, data):
+        lookups = self.context['lookups']
+        username = data.get('authorsender') or self.context['request'].user.username
+        authorsender = lookups.users.get(username)
+        if authorsender is None:
+            message = _("The '{}' user does not exist".format(username))
+            raise serializers.ValidationError({'authorsender': message})
+
+        title = data['subreddit']
+        if title.lower() in Sub.pseudo_subreddits:
+            message = _(
+                ("You can't create a {} to the "
+                 "'{}' subreddit.".format(self.request_name, title))
+            )
+            raise serializers.ValidationError({'subreddit': message})
+        subreddit = lookups.subs.get(title)
+        if subreddit is None:
+            message = _("The '{}' subreddit does not exist".format(title))
+            raise serializers.ValidationError({'subreddit': message})
+
+        if (authorsender.pk, subreddit.pk) not in lookups.memberships:
+            message = _("You must be a member of the subreddit to {} here.".format(
+                self.request_name
+            ))
+            raise serializers.ValidationError(message)
+
+        data['authorsender'] = authorsender
+        data['subreddit'] = subreddit
+        return data
+
+
+class BulkRequestCreateView(GenericAPIView):
+    """
+    Create many loanrequests/savingrequests with one POST of a list of
+    items like
+        {"title": ..., "body": ..., "subreddit": <title>,
+         "authorsender": <username, optional>, <amount field>: ...}
+
+    Every item is validated, the valid ones are inserted together with
+    bulk_create in one transaction. The response has one result per
+    item in the same order:
+        {"index": 0, "status": "created", "pk": 12}
+        {"index": 1, "status": "error", "errors": {...}}
+    and is a 201 if everything was created, a 400 if nothing was and a
+    207 otherwise.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = None
+    lookups = None
+
+    def get_max_items(self):
+        return getattr(settings, 'BULK_CREATE_MAX_ITEMS', 5000)
+
+    def get_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(_("Expected a list of items."))
+        if not items:
+            raise ValidationError(_("The list of items is empty."))
+        if len(items) > self.get_max_items():
+            raise ValidationError(_("At most {} items per request.".format(
+                self.get_max_items()
+            )))
+        return items
+
+    def get_lookups(self, items):
+        usernames = {self.request.user.username}
+        titles = set()
+        for item in items:
+            if isinstance(item, dict):
+                if item.get('authorsender'):
+                    usernames.add(str(item['authorsender']))
+                if item.get('subreddit'):
+                    titles.add(str(item['subreddit']))
+        return BulkLookups(usernames, titles)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['lookups'] = self.lookups
+        return context
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        self.lookups = self.get_lookups(items)
+        # one serializer validates every item, like ListSerializer does
+        serializer = self.get_serializer()
+        model = serializer.Meta.model
+
+        results = []
+        instances = []
+        for index, item in enumerate(items):
+            try:
+                validated_data = serializer.run_validation(item)
+            except ValidationError as exc:
+                results.append({
+                    'index': index,
+                    'status': 'error',
+                    'errors': exc.detail,
+                })
+                continue
+            result = {'index': index, 'status': 'created'}
+            results.append(result)
+            instances.append((result, model(**validated_data)))
+
+        bulk_create_with_pks(model, [instance for _result, instance in instances])
+        for result, instance in instances:
+            result['pk'] = instance.pk
+
+        if not instances:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(instances) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'created': len(instances),
+            'failed': len(items) - len(instances),
+            'results': results,
+        }, status=response_status)
@@ -0,0 +1,189 @@
+"""
+Server side cache for read endpoints.
+
+A cached response is stored under a key built from the request path,
+the sorted query string, the auth scope (anonymous or the user's pk)
+and the current version of every tag the view depends on, e.g.
+'loanrequests' or 'sub:money'. Writes never look for the entries they
+make stale: the signals in core.signals bump the versions of the tags
+they touch, from then on every key built from those tags is new and
+the old entries just age out of the cache.
+
+Those bumps only reach the workers reading the same cache, so by
+default (ENABLED None) the cache is only on when CACHE_ALIAS is shared
+between processes, e.g. memcached or the database cache, and not with
+the per process local memory cache. `manage.py check` reports forcing
+it on with a per process cache.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ENABLED': None,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60,
+    'KEY_PREFIX': 'response',
+}
+
+# caches whose tag bumps never reach another worker
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+# headers a view computes from the rows behind the response, they are
+# cached with it since a hit has no rows to compute them from
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def is_shared(cache):
+    """Whether every worker process sees the same `cache`."""
+    return not isinstance(cache, PROCESS_LOCAL_BACKENDS)
+
+
+class ResponseCache:
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        if self.options['ENABLED'] is None:
+            return self.is_shared()
+        return self.options['ENABLED']
+
+    def is_shared(self):
+        return is_shared(self.cache)
+
+    @property
+    def cache(self):
+        return caches[self.options['CACHE_ALIAS']]
+
+    def tag_key(self, tag):
+        return '{}:tag:{}'.format(self.options['KEY_PREFIX'], tag)
+
+    def get_versions(self, tags):
+        """
+        Current version of each tag. A tag that isn't in the cache
+        (never bumped or evicted) starts at the current time so an
+        entry written under an older version can't match again.
+        """
+        keys = [self.tag_key(tag) for tag in tags]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                self.cache.add(key, time.time_ns(), None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def bump(self, *tags):
+        for tag in tags:
+            key = self.tag_key(tag)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), None)
+
+    def get_scope(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return 'user:{}'.format(user.pk)
+        return 'anon'
+
+    def build_key(self, request, tags):
+        query = sorted(request.GET.lists())
+        versions = self.get_versions(tags)
+        raw = repr((
+            request.path,
+            query,
+            self.get_scope(request),
+            list(zip(tags, versions)),
+        ))
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return '{}:{}'.format(self.options['KEY_PREFIX'], digest)
+
+    def get(self, key):
+        cached = self.cache.get(key)
+        with self.lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return cached
+
+    def set(self, key, response):
+        headers = {
+            header: response[header]
+            for header in CACHED_HEADERS if response.has_header(header)
+        }
+        self.cache.set(
+            key,
+            (response.data, response.status_code, headers),
+            self.options['TIMEOUT']
+        )
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / lookups if lookups else None,
+        }
+
+
+response_cache = ResponseCache(getattr(settings, 'RESPONSE_CACHE', None))
+
+
+class CachedResponseMixin:
+    """
+    Serve GET requests of a view from response_cache.
+
+    cache_tags are the tags the response depends on, a view can
+    compute them per request with get_cache_tags(). Responses
+    depending on who is asking are cached per user unless
+    cache_anonymous_only is set, then authenticated requests always
+    go to the database. Hits carry an `X-Cache: HIT` header.
+    """
+    cache_tags = ()
+    cache_anonymous_only = False
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def should_cache_response(self, request):
+        if not response_cache.enabled:
+            return False
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return False
+        return True
+
+    def get(self, request, *args, **kwargs):
+        tags = self.get_cache_tags() if self.should_cache_response(request) else None
+        if not tags:
+            return super().get(request, *args, **kwargs)
+
+        key = response_cache.build_key(request, tags)
+        cached = response_cache.get(key)
+        if cached is not None:
+            data, status = cached[:2]
+            response = Response(data, status=status)
+            # entries written before headers were cached have none
+            for header, value in (cached[2] if len(cached) > 2 else {}).items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,24 @@
+from django.core.checks import Error, register
+
+from .cache import response_cache
+
+
+@register()
+def check_response_cache(app_configs, **kwargs):
+    """
+    Tag bumps only reach the process that made the write, with a per
+    process cache every other gunicorn worker keeps serving stale
+    pages until they time out.
+    """
+    if response_cache.options['ENABLED'] and not response_cache.is_shared():
+        return [Error(
+            "RESPONSE_CACHE is enabled with a cache that isn't shared "
+            "between worker processes.",
+            hint=(
+                "Point RESPONSE_CACHE['CACHE_ALIAS'] at memcached or the "
+                "database cache, or leave ENABLED as None to turn the "
+                "response cache on only for a shared cache."
+            ),
+            id='core.E001',
+        )]
+    return []
@@ -0,0 +1,126 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def get_page_state(paginator):
+    """
+    What a page depends on besides its own rows: the total count in
+    page number mode, whether there are pages around it in cursor mode.
+    """
+    keyset = getattr(paginator, 'keyset', None)
+    if keyset is not None:
+        return (keyset.has_previous, keyset.has_next)
+    page = getattr(paginator, 'page', None)
+    if page is not None:
+        return page.paginator.count
+    return None
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for GET requests.
+
+    The ETag is a weak hash of the (pk, last_modified_field) pairs of
+    the page or object behind the response, plus the count of a page
+    numbered list, so an insert, a delete or a save (last_modified_field
+    is an auto_now column) changes it. Things a save of the row itself
+    doesn't touch, e.g. a sub title or the naturaltime 'created'
+    strings, don't, hence weak. Only a single object gets a
+    Last-Modified: the newest row of a list says nothing about deletes.
+
+    A request with If-None-Match or If-Modified-Since gets its
+    validators from a query over the same filtered and paginated rows
+    that loads nothing but those two columns, and a 304 before
+    anything is serialized. Otherwise the validators come from the
+    rows the response was built from, and are cached with it.
+    """
+    last_modified_field = 'updated'
+
+    _validator_objects = None
+
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        self._validator_objects = page
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        self._validator_objects = [obj]
+        return obj
+
+    def get_rows(self, objects):
+        return [(obj.pk, getattr(obj, self.last_modified_field)) for obj in objects]
+
+    def build_validators(self, rows, page_state=None):
+        """(etag, last_modified) of (pk, last_modified_field) rows."""
+        rows = list(rows)
+        raw = repr((self.request.accepted_media_type, rows, page_state))
+        etag = 'W/"{}"'.format(hashlib.md5(raw.encode('utf-8')).hexdigest())
+        last_modified = None
+        if self.is_detail() and rows and rows[0][1] is not None:
+            last_modified = http_date(timegm(rows[0][1].utctimetuple()))
+        return etag, last_modified
+
+    def get_validators(self):
+        """
+        (etag, last_modified) without loading or serializing the rows,
+        (None, None) if the object doesn't exist.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        queryset = queryset.values_list('pk', self.last_modified_field)
+        if self.is_detail():
+            rows = list(queryset[:1])
+            return self.build_validators(rows) if rows else (None, None)
+        if self.pagination_class is None:
+            return self.build_validators(queryset)
+        paginator = self.pagination_class()
+        rows = paginator.paginate_queryset(queryset, self.request, view=self)
+        return self.build_validators(rows, get_page_state(paginator))
+
+    def add_validators(self, response, page_state=None):
+        if response.status_code == 200 and self._validator_objects is not None:
+            etag, last_modified = self.build_validators(
+                self.get_rows(self._validator_objects), page_state
+            )
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = last_modified
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        return self.add_validators(response, get_page_state(self.paginator))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.add_validators(super().retrieve(request, *args, **kwargs))
+
+    def get(self, request, *args, **kwargs):
+        if not any(header in request.META for header in CONDITIONAL_HEADERS):
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators()
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=parse_http_date_safe(last_modified) if last_modified else None
+            )
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                if last_modified is not None:
+                    not_modified['Last-Modified'] = last_modified
+                return not_modified
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,266 @@
+"""
+Synthetic data at load test scale for the generate_dataset command.
+
+The factories create one object per INSERT with fresh Faker calls for
+every field, fine for a few hundred rows but hours for millions. Here
+Faker only fills a TextPool once, rows are put together from the pool
+in memory and written with bulk_create, the lengths of bodies and sub
+descriptions follow the same beta distributions as the factories.
+
+Everything comes from the seed: every batch draws from its own
+random.Random seeded with (seed, kind, batch number), so the same
+seed on the same starting database gives the same rows no matter how
+many worker processes share the batches. Timestamps are relative to
+the `now` the generator is given.
+"""
+import hashlib
+import random
+from collections import defaultdict
+from datetime import timedelta
+from multiprocessing import Pool
+
+import faker
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.db.models import Max
+from rest_framework.authtoken.models import Token
+
+from loanrequests.models import Loanrequest
+from redditors.models import User, UserSubMembership
+from savingrequests.factory import SavingrequestFactory
+from savingrequests.models import Savingrequest
+from subs.factory import SubredditFactory
+from subs.models import Sub
+from utilities.bulk import bulk_create_with_pks
+
+PASSWORD = 'testPassword'
+CREATED_SPAN = timedelta(days=365)
+
+# name -> (model, amount field, lowest amount, highest amount)
+REQUESTS = {
+    'loanrequests': (Loanrequest, 'loanamount', 1000, 500000),
+    'savingrequests': (Savingrequest, 'savingamount', 100, 100000),
+}
+
+
+def batch_rng(seed, kind, number):
+    digest = hashlib.sha256('{}:{}:{}'.format(seed, kind, number).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def batches(total, batch_size):
+    """(batch number, rows in it) pairs covering total rows."""
+    return [
+        (number, min(batch_size, total - start))
+        for number, start in enumerate(range(0, total, batch_size))
+    ]
+
+
+class TextPool:
+    """
+    Faker output generated once from the seed and then sampled,
+    calling Faker for every row is what makes the factories slow.
+    """
+
+    def __init__(self, seed, size=5000):
+        fake = faker.Faker()
+        fake.seed_instance(seed)
+        self.fake = fake
+        self.sentences = [fake.sentence() for _ in range(size)]
+        self.slugs = [fake.slug() for _ in range(size)]
+        self.usernames = [fake.user_name() for _ in range(size)]
+        self.first_names = [fake.first_name() for _ in range(size // 10)]
+        self.last_names = [fake.last_name() for _ in range(size // 10)]
+        self.cities = [fake.city() for _ in range(size // 10)]
+
+    def title(self, rng):
+        return rng.choice(self.sentences)[:150]
+
+    def text(self, rng, length):
+        """Whole sentences up to about `length` characters."""
+        parts = []
+        total = 0
+        while total < length:
+            sentence = rng.choice(self.sentences)
+            parts.append(sentence)
+            total += len(sentence) + 1
+        return ' '.join(parts)[:length]
+
+
+class DatasetGenerator:
+    """
+    Writes users, subs, memberships, moderators and then the
+    loanrequests/savingrequests, reporting through `progress(kind,
+    rows written so far, total)` if given.
+
+    Users, subs and requests go through bulk_create_with_pks so the
+    search index receivers see them. Memberships and moderators are
+    plain bulk_creates of new rows, the sub counters are recounted
+    once at the end instead of per batch.
+    """
+
+    def __init__(self, seed=0, batch_size=2000, workers=1, now=None, progress=None):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.workers = workers
+        self.now = now
+        self.progress = progress
+        self.pool = TextPool(seed)
+
+    def report(self, kind, done, total):
+        if self.progress is not None:
+            self.progress(kind, done, total)
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        # new rows are numbered after the existing ones so usernames,
+        # emails and aadharcards stay unique on a second run
+        offset = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        user_pks = []
+        done = 0
+        for number, size in batches(count, self.batch_size):
+            rng = batch_rng(self.seed, 'users', number)
+            users = []
+            for index in range(offset + done + 1, offset + done + size + 1):
+                username = '{}{}'.format(rng.choice(self.pool.usernames)[:20], index)
+                users.append(User(
+                    username=username,
+                    email='{}@example.com'.format(username),
+                    password=password,
+                    karma=rng.randint(0, 10000),
+                    first_name=rng.choice(self.pool.first_names),
+                    last_name=rng.choice(self.pool.last_names),
+                    location=rng.choice(self.pool.cities),
+                    aadharcard='{:012d}'.format(index),
+                    savingtarget=rng.randint(1, 100) * 1000,
+                    age=rng.randint(18, 80),
+                ))
+            with transaction.atomic():
+                bulk_create_with_pks(User, users, self.batch_size)
+                # bulk_create skips the post_save that creates tokens
+                Token.objects.bulk_create([
+                    Token(key='{:040x}'.format(rng.getrandbits(160)), user=user)
+                    for user in users
+                ])
+            user_pks.extend(user.pk for user in users)
+            done += size
+            self.report('users', done, count)
+        return user_pks
+
+    def create_subs(self, count):
+        offset = Sub.objects.aggregate(last=Max('pk'))['last'] or 0
+        rng = batch_rng(self.seed, 'subs', 0)
+        self.pool.fake.seed_instance(self.seed)
+        subs = []
+        for index in range(offset + 1, offset + count + 1):
+            title = SubredditFactory.slug_to_title(rng.choice(self.pool.slugs))
+            subs.append(Sub(
+                title='{}{}'.format(title[:32], index),
+                description=SubredditFactory.get_description(self.pool.fake, rng)[:1000],
+            ))
+        for start in range(0, count, self.batch_size):
+            bulk_create_with_pks(Sub, subs[start:start + self.batch_size], self.batch_size)
+            self.report('subs', min(start + self.batch_size, count), count)
+        return [sub.pk for sub in subs]
+
+    def create_memberships(self, user_pks, sub_pks, per_user):
+        """
+        Every user joins 1 to 2 * per_user - 1 distinct subs, picked
+        with a 1/rank weight so a few subs end up much bigger than
+        the rest, like on the real site.
+        """
+        if not sub_pks:
+            return []
+        cum_weights = []
+        total = 0
+        for rank in range(1, len(sub_pks) + 1):
+            total += 1 / rank
+            cum_weights.append(total)
+        most = min(max(2 * per_user - 1, 1), len(sub_pks))
+
+        pairs = []
+        done = 0
+        for number, size in batches(len(user_pks), self.batch_size):
+            rng = batch_rng(self.seed, 'memberships', number)
+            memberships = []
+            for user_pk in user_pks[done:done + size]:
+                wanted = rng.randint(1, most)
+                chosen = set()
+                while len(chosen) < wanted:
+                    chosen.update(rng.choices(sub_pks, cum_weights=cum_weights, k=wanted))
+                for sub_pk in sorted(chosen)[:wanted]:
+                    pairs.append((user_pk, sub_pk))
+                    memberships.append(UserSubMembership(user_id=user_pk, sub_id=sub_pk))
+            UserSubMembership.objects.bulk_create(memberships)
+            done += size
+            self.report('memberships', done, len(user_pks))
+        return pairs
+
+    def create_moderators(self, pairs):
+        """1 to 3 moderators for every sub, out of its members."""
+        members = defaultdict(list)
+        for user_pk, sub_pk in pairs:
+            members[sub_pk].append(user_pk)
+        rng = batch_rng(self.seed, 'moderators', 0)
+        through = Sub.moderators.through
+        moderators = []
+        for sub_pk in sorted(members):
+            for user_pk in rng.sample(members[sub_pk], min(rng.randint(1, 3), len(members[sub_pk]))):
+                moderators.append(through(sub_id=sub_pk, user_id=user_pk))
+        through.objects.bulk_create(moderators)
+        self.report('moderators', len(moderators), len(moderators))
+        return moderators
+
+    def create_requests(self, name, count, pairs):
+        if not pairs or not count:
+            return
+        jobs = [(name, number, size) for number, size in batches(count, self.batch_size)]
+        done = 0
+        if self.workers > 1:
+            # forked children must not share the parent's connection
+            connections.close_all()
+            with Pool(self.workers, _init_worker, (self, pairs)) as pool:
+                for size in pool.imap_unordered(_run_request_batch, jobs):
+                    done += size
+                    self.report(name, done, count)
+        else:
+            _init_worker(self, pairs)
+            for job in jobs:
+                done += _run_request_batch(job)
+                self.report(name, done, count)
+
+    def build_requests(self, name, number, size, pairs):
+        model, amount_field, lowest, highest = REQUESTS[name]
+        rng = batch_rng(self.seed, name, number)
+        span = CREATED_SPAN.total_seconds()
+        requests = []
+        for _ in range(size):
+            user_pk, sub_pk = rng.choice(pairs)
+            created = self.now - timedelta(seconds=rng.random() * span)
+            requests.append(model(**{
+                'title': self.pool.title(rng),
+                'body': self.pool.text(rng, SavingrequestFactory.get_body_length(rng)),
+                amount_field: rng.randint(lowest, highest),
+                'subreddit_id': sub_pk,
+                'authorsender_id': user_pk,
+                'created': created,
+            }))
+        return requests
+
+
+# state of a worker process, set by _init_worker
+_generator = None
+_pairs = None
+
+
+def _init_worker(generator, pairs):
+    global _generator, _pairs
+    _generator = generator
+    _pairs = pairs
+
+
+def _run_request_batch(job):
+    name, number, size = job
+    requests = _generator.build_requests(name, number, size, _pairs)
+    bulk_create_with_pks(REQUESTS[name][0], requests, _generator.batch_size)
+    return size
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from datetime import datetime, time
+
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import get_current_timezone, is_naive, make_aware
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from loanrequests.models import Loanrequest
+from savingrequests.models import Savingrequest
+from utilities import export
+
+COMMON_COLUMNS = (
+    ('pk', 'pk'),
+    ('created', 'created'),
+    ('updated', 'updated'),
+    ('title', 'title'),
+    ('body', 'body'),
+    ('subreddit', 'subreddit__title'),
+    ('authorsender', 'authorsender__username'),
+)
+
+# name -> (model, [(header, values_list column)])
+EXPORTS = OrderedDict((
+    ('loanrequests', (
+        Loanrequest,
+        list(COMMON_COLUMNS[:4]) + [('loanamount', 'loanamount')] +
+        list(COMMON_COLUMNS[4:])
+    )),
+    ('savingrequests', (
+        Savingrequest,
+        list(COMMON_COLUMNS[:4]) + [('savingamount', 'savingamount')] +
+        list(COMMON_COLUMNS[4:])
+    )),
+))
+
+
+def parse_moment(value, name, end=False):
+    """
+    Accept either a full datetime or a plain date. A date means the
+    start of that day for `since` and the end of it for `until`.
+    """
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        moment = day = None
+    if moment is None:
+        if day is None:
+            raise ValidationError({name: _("Expected a date or datetime.")})
+        moment = datetime.combine(day, time.max if end else time.min)
+    if is_naive(moment):
+        moment = make_aware(moment, get_current_timezone())
+    return moment
+
+
+def get_export_queryset(model, sub=None, author=None, since=None, until=None):
+    """
+    The rows of an export in pk order, narrowed down by sub title,
+    author username and a created date range.
+    """
+    queryset = model.objects.order_by('pk')
+    if sub:
+        queryset = queryset.filter(subreddit__title=sub)
+    if author:
+        queryset = queryset.filter(authorsender__username=author)
+    since = parse_moment(since, 'since')
+    until = parse_moment(until, 'until', end=True)
+    if since:
+        queryset = queryset.filter(created__gte=since)
+    if until:
+        queryset = queryset.filter(created__lte=until)
+    return queryset
+
+
+def stream_export(name, output, chunk_size=2000, **filters):
+    model, columns = EXPORTS[name]
+    queryset = get_export_queryset(model, **filters)
+    return export.iter_export(
+        output,
+        queryset,
+        [column for _header, column in columns],
+        headers=[header for header, _column in columns],
+        chunk_size=chunk_size
+    )
+
+
+class ExportView(APIView):
+    """
+    Stream every loanrequest/savingrequest matching the filters as CSV
+    or newline delimited JSON. Admins only.
+
+    query parameters: output (csv or ndjson), sub, author, since, until
+    """
+    http_method_names = ['get']
+    permission_classes = (IsAdminUser,)
+    export_name = None
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', export.CSV)
+        if output not in export.CONTENT_TYPES:
+            raise ValidationError({
+                'output': _("Output must be either 'csv' or 'ndjson'.")
+            })
+        filters = {
+            name: request.query_params.get(name)
+            for name in ('sub', 'author', 'since', 'until')
+        }
+        # the filters are parsed right away so bad ones are a 400
+        # instead of an error in the middle of the stream
+        rows = stream_export(self.export_name, output, self.chunk_size, **filters)
+        response = StreamingHttpResponse(
+            rows,
+            content_type=export.CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(
+            self.export_name, output
+        )
+        return response
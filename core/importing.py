@@ -0,0 +1,256 @@
+"""
+Bulk import for the import_export admins and the import_requests
+command.
+
+BulkModelResource turns django-import-export's row by row import
+into a set based one: existing rows are loaded with one query per
+dataset, foreign keys are resolved through maps built with one query
+per column, and rows are written with bulk_create/bulk_update.
+
+import_in_chunks() feeds a file to a resource chunk_size rows at a
+time, each chunk in its own transaction, so a huge spreadsheet is
+neither held in memory nor in one transaction.
+"""
+import csv
+import json
+from collections import Counter
+
+import tablib
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from import_export import resources, widgets
+from import_export.instance_loaders import CachedInstanceLoader
+
+from utilities.bulk import bulk_create_with_pks, bulk_update_with_signal
+
+
+class LookupForeignKeyWidget(widgets.ForeignKeyWidget):
+    """
+    ForeignKeyWidget answering from a map of field value -> object
+    that the resource fills once per dataset, instead of one query
+    per row.
+    """
+
+    def __init__(self, model, field='pk', *args, **kwargs):
+        super().__init__(model, field, *args, **kwargs)
+        self.lookup = {}
+
+    def prepare(self, values):
+        values = {value for value in values if value not in (None, '')}
+        self.lookup = {
+            str(getattr(obj, self.field)): obj
+            for obj in self.model.objects.filter(
+                **{'{}__in'.format(self.field): values}
+            )
+        }
+
+    def clean(self, value, row=None, *args, **kwargs):
+        if value in (None, ''):
+            return None
+        try:
+            return self.lookup[str(value)]
+        except KeyError:
+            raise ValueError("{} '{}' does not exist".format(
+                self.model._meta.verbose_name, value
+            ))
+
+
+class LookupInstanceLoader(CachedInstanceLoader):
+    """
+    CachedInstanceLoader that also works for files without an id
+    column, every row is new then.
+    """
+
+    def __init__(self, resource, dataset=None):
+        pk_field_name = resource.get_import_id_fields()[0]
+        column_name = resource.fields[pk_field_name].column_name
+        if dataset is not None and column_name in (dataset.headers or []):
+            super().__init__(resource, dataset)
+        else:
+            self.resource = resource
+            self.dataset = dataset
+            self.all_instances = {}
+            self.pk_field = resource.fields[pk_field_name]
+
+
+class BulkModelResource(resources.ModelResource):
+    """
+    ModelResource writing in batches of Meta.batch_size. bulk_create
+    and bulk_update don't send post_save, they go through the
+    utilities.bulk helpers so the post_bulk_* receivers (search index,
+    response cache) still see the rows.
+    A batch that fails to write raises instead of only being logged
+    like in import_export, so rows can't go missing silently.
+    """
+
+    class Meta:
+        use_bulk = True
+        batch_size = 1000
+        skip_diff = True
+        instance_loader_class = LookupInstanceLoader
+
+    def before_import(self, dataset, using_transactions, dry_run, **kwargs):
+        for field in self.get_import_fields():
+            if isinstance(field.widget, LookupForeignKeyWidget) and \
+                    field.column_name in (dataset.headers or []):
+                field.widget.prepare(dataset[field.column_name])
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None):
+        try:
+            if self.create_instances and (using_transactions or not dry_run):
+                bulk_create_with_pks(
+                    self._meta.model,
+                    self.create_instances,
+                    batch_size=batch_size or self._meta.batch_size
+                )
+        finally:
+            self.create_instances.clear()
+
+    def get_auto_now_fields(self):
+        return [
+            field for field in self._meta.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+
+    def get_bulk_update_fields(self):
+        """
+        bulk_update doesn't apply auto_now like save() does, the
+        `updated` columns are set in bulk_update() and written here.
+        """
+        fields = list(super().get_bulk_update_fields())
+        return fields + [
+            field.name for field in self.get_auto_now_fields()
+            if field.name not in fields
+        ]
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors, batch_size=None):
+        try:
+            if self.update_instances and (using_transactions or not dry_run):
+                now = timezone.now()
+                for instance in self.update_instances:
+                    for field in self.get_auto_now_fields():
+                        setattr(instance, field.attname, now)
+                bulk_update_with_signal(
+                    self._meta.model,
+                    self.update_instances,
+                    self.get_bulk_update_fields(),
+                    batch_size=batch_size or self._meta.batch_size
+                )
+        finally:
+            self.update_instances.clear()
+
+
+class ReservedTitleMixin:
+    """
+    Sub.save() refuses the pseudo subreddit titles, bulk_create never
+    calls save() so check them here.
+    """
+
+    def before_save_instance(self, instance, using_transactions, dry_run):
+        if instance.title.lower() in instance.pseudo_subreddits:
+            raise ValidationError({
+                'title': "The subreddit title '{}' is reserved".format(instance.title)
+            })
+        super().before_save_instance(instance, using_transactions, dry_run)
+
+
+def iter_csv_rows(stream):
+    reader = csv.reader(stream)
+    headers = next(reader, None)
+    if headers is None:
+        return
+    for values in reader:
+        yield dict(zip(headers, values))
+
+
+def iter_ndjson_rows(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportSummary:
+    """
+    Running totals over all chunks plus the first max_errors row
+    errors, with their row number in the file (1 is the first row
+    after the header). The rows of a chunk that was rolled back
+    because of an error count as failed, not as new or updated.
+    """
+
+    def __init__(self, max_errors=100):
+        self.max_errors = max_errors
+        self.totals = Counter()
+        self.rows = 0
+        self.chunks = 0
+        self.rolled_back_chunks = 0
+        self.rolled_back_rows = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        if len(self.errors) < self.max_errors:
+            self.errors.append((row_number, message))
+
+    def add(self, result, offset, rows, rolled_back=False):
+        self.chunks += 1
+        self.rows += rows
+        if rolled_back:
+            self.rolled_back_chunks += 1
+            self.rolled_back_rows += rows
+        else:
+            self.totals.update(result.totals)
+        for error in result.base_errors:
+            self.add_error(None, str(error.error))
+        for row_number, errors in result.row_errors():
+            for error in errors:
+                self.add_error(offset + row_number, str(error.error))
+        for invalid in result.invalid_rows:
+            messages = [
+                '{}: {}'.format(field, ' '.join(str(m) for m in field_errors))
+                for field, field_errors in invalid.error_dict.items()
+            ]
+            self.add_error(offset + invalid.number, '; '.join(messages))
+
+    @property
+    def failed(self):
+        return self.totals['error'] + self.totals['invalid'] + self.rolled_back_rows
+
+
+def import_in_chunks(resource, stream, input_format='csv', chunk_size=1000,
+                     dry_run=False, progress=None, max_errors=100):
+    """
+    Import a csv or ndjson text stream through `resource` chunk_size
+    rows at a time. Every chunk runs in its own transaction, which is
+    rolled back on a dry run or when a row failed with an unexpected
+    error, like the admin does. Invalid rows are just left out.
+    import_export's own transaction handling is off because it wraps
+    every single row in a savepoint. `progress` is called with the
+    summary after each chunk.
+    """
+    rows = iter_csv_rows(stream) if input_format == 'csv' else iter_ndjson_rows(stream)
+    summary = ImportSummary(max_errors=max_errors)
+    for chunk in iter_chunks(rows, chunk_size):
+        headers = list(chunk[0])
+        dataset = tablib.Dataset(headers=headers)
+        for row in chunk:
+            dataset.append([row.get(header, '') for header in headers])
+        with transaction.atomic():
+            result = resource.import_data(dataset, use_transactions=False)
+            if dry_run or result.has_errors():
+                transaction.set_rollback(True)
+        summary.add(result, summary.rows, len(chunk), rolled_back=result.has_errors())
+        if progress is not None:
+            progress(summary)
+    return summary
@@ -0,0 +1,130 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+from core.cache import response_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the API benchmark scenarios against the WSGI application "
+        "and the local database and print the results as JSON. Fill "
+        "the database with generate_dataset first; the create scenarios "
+        "add rows to it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*',
+            help="Only run these scenarios, all of them by default."
+        )
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Measured requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help="Requests in flight at once.")
+        parser.add_argument('--warmup', type=int, default=10,
+                            help="Unmeasured requests before each scenario.")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Picks the users, subs and search terms.")
+        parser.add_argument(
+            '--no-response-cache', action='store_true',
+            help="Measure the views without the server side response cache."
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help="Add the query plans of the newest first feeds to the report."
+        )
+        parser.add_argument('--output', help="Write the JSON here instead of stdout.")
+        parser.add_argument(
+            '--compare',
+            help="A previous --output file to compare p95, throughput and queries with."
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help="Relative change counted as a regression by --compare."
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help="Exit with an error if --compare finds a regression."
+        )
+
+    def progress(self, result):
+        latency = result['latency_ms']
+        self.stderr.write(
+            "{name}: {rps} req/s, p50 {p50}ms, p95 {p95}ms, p99 {p99}ms, "
+            "{queries} queries/request, {errors} errors".format(
+                name=result['name'],
+                rps=result['throughput_rps'],
+                p50=latency['p50'],
+                p95=latency['p95'],
+                p99=latency['p99'],
+                queries=result['queries_per_request'],
+                errors=result['errors']
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1 or options['warmup'] < 0:
+            raise CommandError("--requests and --concurrency have to be at least 1")
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as stream:
+                baseline = json.load(stream)
+
+        # imported here so the settings are loaded the way manage.py does
+        from reReddit_backend.wsgi import application
+
+        try:
+            scenarios = benchmark.build_scenarios(options['seed'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        unknown = set(options['scenarios']) - set(scenarios)
+        if unknown:
+            raise CommandError("Unknown scenarios: {}. Choose from {}".format(
+                ', '.join(sorted(unknown)), ', '.join(scenarios)
+            ))
+        if options['scenarios']:
+            scenarios = type(scenarios)(
+                (name, calls) for name, calls in scenarios.items()
+                if name in options['scenarios']
+            )
+        if options['no_response_cache']:
+            response_cache.options['ENABLED'] = False
+
+        report = benchmark.run_benchmark(
+            application,
+            scenarios,
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            warmup=options['warmup'],
+            progress=self.progress
+        )
+        report['seed'] = options['seed']
+        if options['explain']:
+            report['plans'] = benchmark.feed_plans(options['seed'])
+        report['response_cache'] = response_cache.enabled
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                out.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = 0
+            for name, metric, was, now, regressed in benchmark.compare(
+                    baseline, report, options['tolerance']):
+                regressions += regressed
+                self.stderr.write("{} {}: {} -> {}{}".format(
+                    name, metric, was, now, "  REGRESSION" if regressed else ""
+                ))
+            for name, before, after in benchmark.changed_plans(baseline, report):
+                self.stderr.write("{} plan changed:\n  before: {}\n  after:  {}".format(
+                    name, '\n          '.join(before), '\n          '.join(after)
+                ))
+            if regressions and options['fail_on_regression']:
+                raise CommandError("{} regressions against {}".format(
+                    regressions, options['compare']
+                ))
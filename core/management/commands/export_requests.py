@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from core.export import EXPORTS, stream_export
+from utilities import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream loanrequests or savingrequests as CSV or NDJSON, "
+        "reading the table in chunks so memory use stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(EXPORTS))
+        parser.add_argument(
+            '--output', choices=list(export.CONTENT_TYPES), default=export.CSV
+        )
+        parser.add_argument('--sub', help="Only rows of this sub (title).")
+        parser.add_argument('--author', help="Only rows of this user (username).")
+        parser.add_argument('--since', help="Created on or after, date or datetime.")
+        parser.add_argument('--until', help="Created on or before, date or datetime.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Rows fetched from the database per round trip."
+        )
+        parser.add_argument(
+            '--file', help="Write here instead of stdout."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            lines = stream_export(
+                options['name'],
+                options['output'],
+                options['chunk_size'],
+                sub=options['sub'],
+                author=options['author'],
+                since=options['since'],
+                until=options['until']
+            )
+        except ValidationError as exc:
+            raise CommandError("; ".join(
+                "{}: {}".format(name, errors)
+                for name, errors in exc.detail.items()
+            ))
+
+        if options['file']:
+            with open(options['file'], 'w', newline='') as out:
+                out.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
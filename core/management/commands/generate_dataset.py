@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.cache import response_cache
+from core.dataset import DatasetGenerator
+from subs.models import Sub
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, subs, memberships, "
+        "moderators, loanrequests and savingrequests for load testing, "
+        "inserted in bulk and reproducible from --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--subs', type=int, default=100)
+        parser.add_argument(
+            '--subs-per-user', type=int, default=5,
+            help="Average number of subs every new user joins."
+        )
+        parser.add_argument('--loanrequests', type=int, default=10000)
+        parser.add_argument('--savingrequests', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help="Rows built in memory and inserted per transaction."
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=("Processes inserting loanrequests/savingrequests in "
+                  "parallel, SQLite always uses one.")
+        )
+
+    def progress(self, kind, done, total):
+        self.stdout.write("{}: {}/{}".format(kind, done, total))
+
+    def handle(self, *args, **options):
+        for name in ('users', 'subs', 'subs_per_user', 'loanrequests',
+                     'savingrequests', 'batch_size', 'workers'):
+            if options[name] < 0:
+                raise CommandError("--{} can't be negative".format(name.replace('_', '-')))
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError("--batch-size and --workers have to be at least 1")
+        if (options['loanrequests'] or options['savingrequests']) and \
+                not (options['users'] and options['subs']):
+            raise CommandError("Requests need at least one new user and one new sub")
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            # one writer at a time, the processes would only queue up
+            self.stdout.write("SQLite only takes one writer, using 1 worker")
+            workers = 1
+
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=workers,
+            now=timezone.now(),
+            progress=self.progress
+        )
+        started = time.monotonic()
+        user_pks = generator.create_users(options['users'])
+        sub_pks = generator.create_subs(options['subs'])
+        pairs = generator.create_memberships(user_pks, sub_pks, options['subs_per_user'])
+        generator.create_moderators(pairs)
+        Sub.objects.filter(pk__in=sub_pks).sync_counters()
+        for name in ('loanrequests', 'savingrequests'):
+            generator.create_requests(name, options[name], pairs)
+        response_cache.bump('subs', 'loanrequests', 'savingrequests')
+
+        rows = (len(user_pks) + len(sub_pks) + len(pairs) +
+                options['loanrequests'] + options['savingrequests'])
+        elapsed = time.monotonic() - started
+        self.stdout.write("Created {} rows in {:.1f}s ({:.0f} rows/s)".format(
+            rows, elapsed, rows / elapsed if elapsed else 0
+        ))
@@ -0,0 +1,87 @@
+import os
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importing import import_in_chunks
+from loanrequests.resources import LoanrequestResource
+from savingrequests.resources import SavingrequestResource
+from subs.resources import SubResource
+
+RESOURCES = OrderedDict((
+    ('loanrequests', LoanrequestResource),
+    ('savingrequests', SavingrequestResource),
+    ('subs', SubResource),
+))
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a large csv or ndjson file through the admin's "
+        "import_export resources, a chunk of rows at a time, each chunk "
+        "in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(RESOURCES))
+        parser.add_argument('file')
+        parser.add_argument(
+            '--input', choices=['csv', 'ndjson'],
+            help="File format, guessed from the extension by default."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Rows read, validated and written per transaction."
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Validate every row but roll every chunk back."
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=100,
+            help="How many row errors to list at the end."
+        )
+
+    def progress(self, summary):
+        self.stdout.write("chunk {}: {} rows, {} new, {} updated, {} failed".format(
+            summary.chunks,
+            summary.rows,
+            summary.totals['new'],
+            summary.totals['update'],
+            summary.failed
+        ))
+
+    def handle(self, *args, **options):
+        path = options['file']
+        input_format = options['input']
+        if input_format is None:
+            extension = os.path.splitext(path)[1].lower().lstrip('.')
+            input_format = 'ndjson' if extension in ('ndjson', 'jsonl') else 'csv'
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size has to be at least 1")
+
+        resource = RESOURCES[options['name']]()
+        with open(path, 'r', encoding='utf-8-sig', newline='') as stream:
+            summary = import_in_chunks(
+                resource,
+                stream,
+                input_format=input_format,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+                progress=self.progress,
+                max_errors=options['max_errors']
+            )
+
+        for row_number, message in summary.errors:
+            self.stderr.write("row {}: {}".format(
+                row_number if row_number is not None else '-', message
+            ))
+        if summary.rolled_back_chunks:
+            self.stderr.write("{} chunks with errors were rolled back, {} rows".format(
+                summary.rolled_back_chunks, summary.rolled_back_rows
+            ))
+        self.stdout.write("Imported {} of {} rows{}".format(
+            summary.rows - summary.failed,
+            summary.rows,
+            " (dry run)" if options['dry_run'] else ""
+        ))
@@ -0,0 +1,223 @@
+"""
+Request metrics in the Prometheus text format.
+
+MetricsMiddleware records every request under the name of the URL
+pattern it resolved to (e.g. 'loanrequest-list'), its method and its
+status code: a request counter, a latency histogram, a histogram of
+the number of database queries and the total database time.
+
+Each process keeps its series in memory behind a lock, recording is a
+few dict and bisect operations. For multi-process servers (gunicorn
+workers) every process also writes its totals to its own file in
+METRICS['DIRECTORY'] at most once per FLUSH_INTERVAL seconds, and the
+metrics endpoint adds up the files of all processes. Files of
+processes that exited are kept so the counters never go down; use a
+fresh directory per deploy, like prometheus_client's multiprocess
+mode.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DIRECTORY': None,
+    'FLUSH_INTERVAL': 1,
+    'AUTH_TOKEN': None,
+}
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def new_series():
+    return {
+        'count': 0,
+        'duration_sum': 0.0,
+        'duration_buckets': [0] * (len(DURATION_BUCKETS) + 1),
+        'queries_sum': 0,
+        'queries_buckets': [0] * (len(QUERY_BUCKETS) + 1),
+        'db_seconds': 0.0,
+    }
+
+
+def merge_series(into, series):
+    into['count'] += series['count']
+    into['duration_sum'] += series['duration_sum']
+    into['queries_sum'] += series['queries_sum']
+    into['db_seconds'] += series['db_seconds']
+    for name in ('duration_buckets', 'queries_buckets'):
+        into[name] = [a + b for a, b in zip(into[name], series[name])]
+
+
+class MetricsRegistry:
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self):
+        return self.options['ENABLED']
+
+    def reset(self):
+        # a new identity per process, a forked worker must not keep
+        # writing to its parent's file
+        self.pid = os.getpid()
+        self.process_id = '{}-{}'.format(self.pid, time.time_ns())
+        self.series = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, view, method, status, duration, queries, db_seconds):
+        key = (view, method, str(status))
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = new_series()
+            series['count'] += 1
+            series['duration_sum'] += duration
+            series['duration_buckets'][bisect_left(DURATION_BUCKETS, duration)] += 1
+            series['queries_sum'] += queries
+            series['queries_buckets'][bisect_left(QUERY_BUCKETS, queries)] += 1
+            series['db_seconds'] += db_seconds
+        if self.options['DIRECTORY'] and \
+                time.monotonic() - self.last_flush >= self.options['FLUSH_INTERVAL']:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                dict(series, key=list(key),
+                     duration_buckets=list(series['duration_buckets']),
+                     queries_buckets=list(series['queries_buckets']))
+                for key, series in self.series.items()
+            ]
+
+    def get_path(self):
+        return os.path.join(
+            self.options['DIRECTORY'], 'metrics-{}.json'.format(self.process_id)
+        )
+
+    def flush(self):
+        """Write this process' totals, skipped if another thread is at it."""
+        if not self.options['DIRECTORY'] or not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_flush = time.monotonic()
+            os.makedirs(self.options['DIRECTORY'], exist_ok=True)
+            path = self.get_path()
+            temp_path = '{}.tmp'.format(path)
+            with open(temp_path, 'w') as out:
+                json.dump(self.snapshot(), out)
+            os.replace(temp_path, path)
+        finally:
+            self.flush_lock.release()
+
+    def collect(self):
+        """Totals of every process, key -> series."""
+        totals = {}
+        entries = []
+        directory = self.options['DIRECTORY']
+        if directory and os.path.isdir(directory):
+            own = os.path.basename(self.get_path())
+            for name in sorted(os.listdir(directory)):
+                if not name.startswith('metrics-') or not name.endswith('.json') \
+                        or name == own:
+                    continue
+                try:
+                    with open(os.path.join(directory, name)) as stream:
+                        entries.extend(json.load(stream))
+                except (OSError, ValueError):
+                    # being replaced right now, it is in the next scrape
+                    continue
+        entries.extend(self.snapshot())
+        for entry in entries:
+            key = tuple(entry['key'])
+            if key not in totals:
+                totals[key] = new_series()
+            merge_series(totals[key], entry)
+        return totals
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(view, method, status, **extra):
+    labels = [('view', view), ('method', method), ('status', status)]
+    labels.extend(extra.items())
+    return '{' + ','.join(
+        '{}="{}"'.format(name, escape(value)) for name, value in labels
+    ) + '}'
+
+
+def format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render(totals):
+    """The Prometheus text exposition of collect()'s totals."""
+    lines = []
+    keys = sorted(totals)
+
+    def header(name, kind, text):
+        lines.append('# HELP {} {}'.format(name, text))
+        lines.append('# TYPE {} {}'.format(name, kind))
+
+    def histogram(name, buckets, counts_field, sum_field):
+        for key in keys:
+            series = totals[key]
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), series[counts_field]):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    name, format_labels(*key, le=bound), cumulative
+                ))
+            lines.append('{}_sum{} {}'.format(
+                name, format_labels(*key), format_number(series[sum_field])
+            ))
+            lines.append('{}_count{} {}'.format(
+                name, format_labels(*key), series['count']
+            ))
+
+    header('http_requests_total', 'counter',
+           'Requests handled, by URL name, method and status code.')
+    for key in keys:
+        lines.append('http_requests_total{} {}'.format(
+            format_labels(*key), totals[key]['count']
+        ))
+
+    header('http_request_duration_seconds', 'histogram',
+           'Time from the first middleware to the response.')
+    histogram('http_request_duration_seconds', DURATION_BUCKETS,
+              'duration_buckets', 'duration_sum')
+
+    header('http_request_db_queries', 'histogram',
+           'Database queries run by the request thread per request.')
+    histogram('http_request_db_queries', QUERY_BUCKETS,
+              'queries_buckets', 'queries_sum')
+
+    header('http_request_db_seconds_total', 'counter',
+           'Time spent in database queries by the request thread.')
+    for key in keys:
+        lines.append('http_request_db_seconds_total{} {}'.format(
+            format_labels(*key), format_number(totals[key]['db_seconds'])
+        ))
+    return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry(getattr(settings, 'METRICS', None))
+atexit.register(metrics.flush)
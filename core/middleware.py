@@ -0,0 +1,69 @@
+import time
+
+from django.db import connection
+
+from .metrics import metrics
+from .slowlog import SlowQueryRecorder, slow_query_log
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class QueryTimer:
+    """execute_wrapper counting the queries of a request and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Record every request in core.metrics. Goes first in MIDDLEWARE so
+    the time of the other middleware is included. Only queries of the
+    request thread are seen, not those SearchView runs in its pool.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics.enabled:
+            return self.get_response(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match is not None else 'unresolved'
+        # keep the label values a small, fixed set
+        method = request.method if request.method in METHODS else 'other'
+        metrics.record(
+            view, method, response.status_code,
+            duration, timer.count, timer.seconds
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Watch the queries of a sampled share of the requests for
+    core.slowlog, does nothing unless SLOW_QUERY_LOG['ENABLED'].
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not slow_query_log.sample():
+            return self.get_response(request)
+        with connection.execute_wrapper(SlowQueryRecorder(slow_query_log, request)):
+            return self.get_response(request)
@@ -0,0 +1,117 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from loanrequests.models import Loanrequest
+from redditors.models import UserSubMembership
+from savingrequests.models import Savingrequest
+from subs.models import Sub
+from utilities.bulk import post_bulk_create, post_bulk_delete, post_bulk_update
+from .cache import response_cache
+
+
+def sub_tag(title):
+    return 'sub:{}'.format(title.lower())
+
+
+def invalidate_loanrequests(sender, instance=None, **kwargs):
+    response_cache.bump('loanrequests')
+
+
+def invalidate_savingrequests(sender, instance=None, **kwargs):
+    response_cache.bump('savingrequests')
+
+
+def invalidate_sub(sender, instance=None, **kwargs):
+    response_cache.bump('subs', sub_tag(instance.title))
+
+
+def invalidate_renamed_sub(sender, instance=None, raw=False, **kwargs):
+    """
+    Renaming a sub moves its pages to a new tag, the ones cached under
+    the old title have to go too.
+    """
+    if raw or instance._state.adding:
+        return
+    title = Sub.objects.filter(pk=instance.pk).values_list('title', flat=True).first()
+    if title is not None and title != instance.title:
+        response_cache.bump(sub_tag(title))
+
+
+def invalidate_membership(sender, instance=None, **kwargs):
+    """Joining or leaving moves the sub's member count."""
+    response_cache.bump('subs', sub_tag(instance.sub.title))
+
+
+def invalidate_bulk_subs(sender, instances=None, **kwargs):
+    response_cache.bump('subs', *[sub_tag(instance.title) for instance in instances])
+
+
+def invalidate_bulk_memberships(sender, instances=None, **kwargs):
+    titles = {instance.sub.title for instance in instances}
+    response_cache.bump('subs', *[sub_tag(title) for title in titles])
+
+
+def invalidate_moderators(sender, instance=None, action=None, reverse=False,
+                          pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        response_cache.bump('subs', sub_tag(instance.title))
+        return
+    # user.moderated_subs changed, pk_set holds sub pks (None on clear)
+    subs = Sub.objects.filter(pk__in=pk_set) if pk_set else instance.moderated_subs.all()
+    titles = list(subs.values_list('title', flat=True))
+    response_cache.bump('subs', *[sub_tag(title) for title in titles])
+
+
+def connect_signals():
+    for model, receiver in (
+            (Loanrequest, invalidate_loanrequests),
+            (Savingrequest, invalidate_savingrequests),
+            (Sub, invalidate_sub),
+            (UserSubMembership, invalidate_membership)):
+        label = model._meta.label_lower
+        post_save.connect(
+            receiver,
+            sender=model,
+            dispatch_uid='response-cache-save-{}'.format(label)
+        )
+        post_delete.connect(
+            receiver,
+            sender=model,
+            dispatch_uid='response-cache-delete-{}'.format(label)
+        )
+    pre_save.connect(
+        invalidate_renamed_sub,
+        sender=Sub,
+        dispatch_uid='response-cache-rename-{}'.format(Sub._meta.label_lower)
+    )
+    for model, receiver in (
+            (Loanrequest, invalidate_loanrequests),
+            (Savingrequest, invalidate_savingrequests),
+            (Sub, invalidate_bulk_subs)):
+        label = model._meta.label_lower
+        post_bulk_create.connect(
+            receiver,
+            sender=model,
+            dispatch_uid='response-cache-bulk-create-{}'.format(label)
+        )
+        post_bulk_update.connect(
+            receiver,
+            sender=model,
+            dispatch_uid='response-cache-bulk-update-{}'.format(label)
+        )
+    post_bulk_create.connect(
+        invalidate_bulk_memberships,
+        sender=UserSubMembership,
+        dispatch_uid='response-cache-bulk-create-memberships'
+    )
+    post_bulk_delete.connect(
+        invalidate_bulk_memberships,
+        sender=UserSubMembership,
+        dispatch_uid='response-cache-bulk-delete-memberships'
+    )
+    m2m_changed.connect(
+        invalidate_moderators,
+        sender=Sub.moderators.through,
+        dispatch_uid='response-cache-moderators'
+    )
@@ -0,0 +1,223 @@
+"""
+Opt-in slow query log.
+
+SlowQueryMiddleware puts a SlowQueryRecorder around the database
+connection of a sampled share of the requests. Every query slower than
+THRESHOLD_MS is kept with the URL name and view class of the request,
+the innermost project function on the stack when the query ran, the
+innermost method of the view on the stack and, for SELECTs, the
+database's EXPLAIN output.
+
+Querysets are lazy, so both are where the query was evaluated, not
+where it was built: the home feed of SubLoanrequestListView is built in
+get_home_queryset but runs in the pagination, its origin is
+LoanrequestListPagination.paginate_queryset and its view method
+paginate_queryset.
+
+Records go to an in-memory ring buffer of the last BUFFER_SIZE slow
+queries, read by staff at /stats/slow-queries/, and, if FILE is set,
+one json object per line to a rotating file. The same statement is
+explained at most once per EXPLAIN_INTERVAL seconds, so a hot slow
+query doesn't double the database load. Queries run by SearchView's
+own threads are not seen.
+"""
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+DEFAULTS = {
+    'ENABLED': False,
+    'THRESHOLD_MS': 100,
+    'SAMPLE_RATE': 1.0,
+    'EXPLAIN': True,
+    'EXPLAIN_INTERVAL': 60,
+    'BUFFER_SIZE': 200,
+    'FILE': None,
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+}
+
+MAX_PARAMS_LENGTH = 500
+
+_local = threading.local()
+
+# frames from these files are never the origin of a query
+IGNORED_FILES = (
+    os.path.abspath(__file__).rsplit('.', 1)[0],
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'middleware'),
+)
+
+
+def get_origin(frame=None):
+    """
+    'module.Class.function:line' of the innermost frame in the project's
+    own code, None if the query was run by library code alone.
+    """
+    frame = frame or sys._getframe(1)
+    base_dir = os.path.abspath(settings.BASE_DIR)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(base_dir) and 'site-packages' not in filename \
+                and filename.rsplit('.', 1)[0] not in IGNORED_FILES:
+            name = frame.f_code.co_name
+            owner = frame.f_locals.get('self')
+            if owner is None:
+                owner = frame.f_locals.get('cls')
+            if owner is not None:
+                owner = owner if isinstance(owner, type) else type(owner)
+                name = '{}.{}'.format(owner.__name__, name)
+            return '{}.{}:{}'.format(frame.f_globals.get('__name__'), name, frame.f_lineno)
+        frame = frame.f_back
+    return None
+
+
+def get_view_method(view_class, frame=None):
+    """
+    Name of the innermost method of a `view_class` instance on the
+    stack, None if there is none.
+    """
+    frame = frame or sys._getframe(1)
+    while frame is not None:
+        if isinstance(frame.f_locals.get('self'), view_class):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """The plan of a SELECT as a list of lines, None for anything else."""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    _local.explaining = True
+    try:
+        # a failing EXPLAIN must not break the request's transaction
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    '{} {}'.format(connection.ops.explain_query_prefix(), sql),
+                    params
+                )
+                rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return ['EXPLAIN failed: {}'.format(exc)]
+    finally:
+        _local.explaining = False
+    return [' | '.join(str(value) for value in row) for row in rows]
+
+
+class SlowQueryLog:
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        self.lock = threading.Lock()
+        self.records = deque(maxlen=self.options['BUFFER_SIZE'])
+        self.explained = {}
+        self.file_logger = None
+        if self.options['FILE']:
+            self.file_logger = logging.getLogger('slow_queries')
+            self.file_logger.propagate = False
+            self.file_logger.setLevel(logging.INFO)
+            handler = RotatingFileHandler(
+                self.options['FILE'],
+                maxBytes=self.options['MAX_BYTES'],
+                backupCount=self.options['BACKUP_COUNT']
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.file_logger.addHandler(handler)
+
+    @property
+    def enabled(self):
+        return self.options['ENABLED']
+
+    def sample(self):
+        return self.enabled and random.random() < self.options['SAMPLE_RATE']
+
+    def should_explain(self, sql):
+        if not self.options['EXPLAIN']:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            last = self.explained.get(sql)
+            if last is not None and now - last < self.options['EXPLAIN_INTERVAL']:
+                return False
+            if len(self.explained) >= 10 * self.options['BUFFER_SIZE']:
+                self.explained.clear()
+            self.explained[sql] = now
+        return True
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+        if self.file_logger is not None:
+            self.file_logger.info(json.dumps(record, default=str))
+
+    def entries(self, view=None, limit=None):
+        """Newest first, optionally only those of one URL name."""
+        with self.lock:
+            records = list(reversed(self.records))
+        if view:
+            records = [record for record in records if record['view'] == view]
+        return records[:limit] if limit else records
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.explained.clear()
+
+
+class SlowQueryRecorder:
+    """execute_wrapper for one request."""
+
+    def __init__(self, log, request):
+        self.log = log
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.log.options['THRESHOLD_MS']:
+            self.record(sql, params, many, context['connection'], duration_ms)
+        return result
+
+    def record(self, sql, params, many, connection, duration_ms):
+        match = getattr(self.request, 'resolver_match', None)
+        view_class = None
+        if match is not None:
+            func = match.func
+            view_class = getattr(func, 'view_class', None) or getattr(func, 'cls', None)
+        frame = sys._getframe(1)
+        plan = None
+        if not many and self.log.should_explain(sql):
+            plan = explain(connection, sql, params)
+        self.log.add({
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'view': (match.url_name or match.view_name) if match is not None else None,
+            'view_class': view_class.__name__ if view_class is not None else None,
+            'origin': get_origin(frame),
+            'view_method': (
+                get_view_method(view_class, frame) if view_class is not None else None
+            ),
+            'method': self.request.method,
+            'path': self.request.path,
+            'database': connection.alias,
+            'sql': sql,
+            'params': repr(params)[:MAX_PARAMS_LENGTH],
+            'plan': plan,
+        })
+
+
+slow_query_log = SlowQueryLog(getattr(settings, 'SLOW_QUERY_LOG', None))
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from loanrequests.models import Loanrequest
+from loanrequests.pagination import LoanrequestListPagination
+from redditors.models import User, UserSubMembership
+from savingrequests.models import Savingrequest
+from savingrequests.pagination import SavingrequestListPagination
+from subs.models import Sub
+
+PAGE_SIZES = (5, 20)
+
+
+class ListQueryCountTests(APITestCase):
+    """
+    The list, search and profile paths fetch the subreddit and the
+    authorsender of their rows in the base query, so the number of
+    queries doesn't grow with the page size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                email='user{}@example.com'.format(number),
+                username='user{}'.format(number),
+                location='Pune',
+                first_name='First',
+                savingtarget=1000,
+                aadharcard='aadhar{}'.format(number),
+                last_name='Last',
+                age=30,
+                password='testPassword',
+            )
+            for number in range(3)
+        ]
+        cls.subs = [
+            Sub.objects.create(title='money{}'.format(number)) for number in range(2)
+        ]
+        for user in cls.users:
+            for sub in cls.subs:
+                UserSubMembership.objects.create(user=user, sub=sub)
+        for number in range(60):
+            user = cls.users[number % len(cls.users)]
+            sub = cls.subs[number % len(cls.subs)]
+            Loanrequest.objects.create(
+                title='Loan request {}'.format(number), body='Body',
+                loanamount=1000, subreddit=sub, authorsender=user,
+            )
+            Savingrequest.objects.create(
+                title='Saving request {}'.format(number), body='Body',
+                savingamount=100, subreddit=sub, authorsender=user,
+            )
+
+    def assertPageQueries(self, num, path, params=None):
+        """Same number of queries for every page size."""
+        for page_size in PAGE_SIZES:
+            with self.subTest(page_size=page_size):
+                with self.assertNumQueries(num):
+                    response = self.client.get(
+                        path, dict(params or {}, page_size=page_size)
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), page_size)
+
+    def test_loanrequest_list(self):
+        self.assertPageQueries(2, '/loanrequests/')
+
+    def test_loanrequest_list_cursor(self):
+        self.assertPageQueries(1, '/loanrequests/', {'pagination': 'cursor'})
+
+    def test_sub_loanrequest_list(self):
+        self.assertPageQueries(3, '/loanrequests/subreddit-list/money0/')
+
+    def test_user_loanrequest_list(self):
+        self.assertPageQueries(3, '/loanrequests/user-loanrequest-list/user0/')
+
+    def test_savingrequest_list(self):
+        self.assertPageQueries(2, '/savingrequests/')
+
+    def test_sub_savingrequest_list(self):
+        self.assertPageQueries(3, '/savingrequests/subreddit-list/money0/')
+
+    def test_search(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(6):
+                    response = self.client.get('/search/', {'q': 'request', 'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['loanrequests']), limit)
+                self.assertEqual(len(response.data['savingrequests']), limit)
+
+    def test_profile(self):
+        for page_size in PAGE_SIZES:
+            with self.subTest(page_size=page_size), \
+                    mock.patch.object(LoanrequestListPagination, 'page_size', page_size), \
+                    mock.patch.object(SavingrequestListPagination, 'page_size', page_size):
+                with self.assertNumQueries(5):
+                    response = self.client.get('/users/profile/user0/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['loanrequests']), page_size)
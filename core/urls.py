@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path(
+        'response-cache/',
+        views.response_cache_stats_view,
+        name='response-cache-stats'
+    ),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('slow-queries/', views.slow_queries_view, name='slow-queries'),
+]
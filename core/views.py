@@ -0,0 +1,61 @@
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .cache import response_cache
+from .metrics import CONTENT_TYPE, metrics, render
+from .slowlog import slow_query_log
+
+
+@api_view(['GET', ])
+@permission_classes((IsAdminUser,))
+def response_cache_stats_view(request):
+    """
+    Hit and miss counters of the response cache, counted since
+    this worker process started.
+    """
+    return Response(response_cache.stats())
+
+
+@api_view(['GET', ])
+def metrics_view(request):
+    """
+    Request metrics of every worker process in the Prometheus text
+    format. Open to staff users and to scrapers sending
+    "Authorization: Bearer <METRICS['AUTH_TOKEN']>".
+    """
+    token = metrics.options['AUTH_TOKEN']
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scraper = bool(token) and constant_time_compare(header, 'Bearer {}'.format(token))
+    if not scraper and not (request.user and request.user.is_staff):
+        raise PermissionDenied()
+    return HttpResponse(render(metrics.collect()), content_type=CONTENT_TYPE)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes((IsAdminUser,))
+def slow_queries_view(request):
+    """
+    The slow queries recorded by this worker process, newest first.
+    DELETE empties the buffer, e.g. after deploying a fix.
+
+    query parameters: view (URL name), limit
+    """
+    if request.method == 'DELETE':
+        slow_query_log.clear()
+        return Response(status=204)
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        limit = 50
+    return Response({
+        'enabled': slow_query_log.enabled,
+        'threshold_ms': slow_query_log.options['THRESHOLD_MS'],
+        'sample_rate': slow_query_log.options['SAMPLE_RATE'],
+        'results': slow_query_log.entries(
+            view=request.query_params.get('view'), limit=max(limit, 1)
+        ),
+    })
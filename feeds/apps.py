@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class FeedsConfig(AppConfig):
+    name = 'feeds'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
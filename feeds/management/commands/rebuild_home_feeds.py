@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from feeds import store
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild every user's materialized home feed from the "
+        "memberships, or with --trim only cut the feeds back to "
+        "HOME_FEED['MAX_ENTRIES'] entries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trim', action='store_true',
+            help="Only delete the entries past the per user limit."
+        )
+
+    def handle(self, *args, **options):
+        if options['trim']:
+            deleted = store.trim()
+            self.stdout.write("Trimmed {} feed entries".format(deleted))
+        else:
+            count = store.rebuild()
+            self.stdout.write("Rebuilt the home feeds, {} entries".format(count))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from feeds import popular
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored hot score of every loanrequest and "
+        "savingrequest, e.g. after changing POPULAR_FEED or writing "
+        "posts without their signals."
+    )
+
+    def handle(self, *args, **options):
+        updated = popular.rescore_all()
+        self.stdout.write("Rescored {} posts".format(updated))
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('subs', '0002_sub_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HomeFeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'loanrequest'), (2, 'savingrequest')])),
+                ('object_id', models.PositiveIntegerField()),
+                ('created', models.DateTimeField()),
+                ('sub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='subs.Sub')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='home_feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='homefeedentry',
+            index=models.Index(fields=['user', 'kind', 'created', 'object_id'], name='feeds_home_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homefeedentry',
+            index=models.Index(fields=['kind', 'object_id'], name='feeds_home_object_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='homefeedentry',
+            unique_together={('user', 'kind', 'object_id')},
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import migrations
+
+# the feeds.store defaults when this migration was written, the SQL is
+# inlined too so later changes to feeds.store can't break it
+FEED_OPTIONS = dict(
+    {'MAX_ENTRIES': 500, 'FANOUT_MAX_MEMBERS': 5000},
+    **getattr(settings, 'HOME_FEED', {})
+)
+
+# HomeFeedEntry.kind
+KINDS = (
+    ('loanrequests', 'Loanrequest', 1),
+    ('savingrequests', 'Savingrequest', 2),
+)
+
+
+def build_feeds(apps, schema_editor):
+    """Fan out the newest MAX_ENTRIES posts per user and kind."""
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    HomeFeedEntry = apps.get_model('feeds', 'HomeFeedEntry')
+    names = {
+        'feed': quote(HomeFeedEntry._meta.db_table),
+        'membership': quote(apps.get_model('redditors', 'UserSubMembership')._meta.db_table),
+        'sub': quote(apps.get_model('subs', 'Sub')._meta.db_table),
+    }
+    HomeFeedEntry.objects.using(connection.alias).all().delete()
+    with connection.cursor() as cursor:
+        for app_label, model_name, kind in KINDS:
+            post = quote(apps.get_model(app_label, model_name)._meta.db_table)
+            cursor.execute(
+                "INSERT INTO {feed} (user_id, sub_id, kind, object_id, created) "
+                "SELECT user_id, sub_id, %s, object_id, created FROM ("
+                "SELECT m.user_id, p.subreddit_id AS sub_id, p.id AS object_id, "
+                "p.created, ROW_NUMBER() OVER ("
+                "PARTITION BY m.user_id ORDER BY p.created DESC, p.id DESC"
+                ") AS position "
+                "FROM {post} p "
+                "JOIN {membership} m ON m.sub_id = p.subreddit_id "
+                "JOIN {sub} s ON s.id = p.subreddit_id "
+                "WHERE s.memberscount <= %s"
+                ") ranked WHERE position <= %s".format(post=post, **names),
+                [kind, FEED_OPTIONS['FANOUT_MAX_MEMBERS'], FEED_OPTIONS['MAX_ENTRIES']]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0001_initial'),
+        ('loanrequests', '0004_feed_indexes'),
+        ('savingrequests', '0003_feed_indexes'),
+        ('redditors', '0003_user_is_verified_aadharcard'),
+        ('subs', '0002_sub_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+# the feeds.popular defaults and formula when this migration was
+# written, inlined so later changes to feeds.popular can't break it
+POPULAR_OPTIONS = dict(
+    {'DECAY': 45000, 'PRECISION': 2},
+    **getattr(settings, 'POPULAR_FEED', {})
+)
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 500
+
+
+def hot_score(members, created):
+    weight = round(math.log10(max(members, 1)), POPULAR_OPTIONS['PRECISION'])
+    return weight + (created - EPOCH).total_seconds() / POPULAR_OPTIONS['DECAY']
+
+
+def score_posts(apps, schema_editor):
+    using = schema_editor.connection.alias
+    members = dict(
+        apps.get_model('subs', 'Sub').objects.using(using).values_list('pk', 'memberscount')
+    )
+    for app_label, model_name in (('loanrequests', 'Loanrequest'),
+                                  ('savingrequests', 'Savingrequest')):
+        model = apps.get_model(app_label, model_name)
+        queryset = model.objects.using(using).only(
+            'pk', 'subreddit', 'created', 'hot'
+        ).order_by('pk')
+        last_pk = 0
+        while True:
+            posts = list(queryset.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not posts:
+                break
+            for post in posts:
+                post.hot = hot_score(members.get(post.subreddit_id, 0), post.created)
+            model.objects.using(using).bulk_update(posts, ['hot'], batch_size=BATCH_SIZE)
+            last_pk = posts[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0002_build_home_feeds'),
+        ('loanrequests', '0005_popular_hot_score'),
+        ('savingrequests', '0004_popular_hot_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(score_posts, migrations.RunPython.noop),
+    ]
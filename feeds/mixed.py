@@ -0,0 +1,155 @@
+"""
+Mixed feeds of loanrequests and savingrequests.
+
+Both tables share the columns a feed is ordered by, so a page of the
+two kinds interleaved is one UNION ALL of a loanrequest and a
+savingrequest SELECT of (created or hot, kind, pk), ordered and limited
+as a whole. Each half is a range scan of its own (…, created, id) or
+(hot, id) index and the database merges the two sorted halves, it
+stops as soon as it has the page. Only then are the rows of the page
+loaded, by pk, with one query per kind.
+
+The kind (HomeFeedEntry.LOANREQUEST or SAVINGREQUEST) is part of the
+ordering and of the cursor since a loanrequest and a savingrequest can
+share a pk and a created.
+"""
+from django.db.models import IntegerField, Q, Value
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import _positive_int
+from rest_framework.response import Response
+
+from utilities.pagination import KeysetPagination, decode_cursor
+from .store import get_kind
+
+ORDERING = ('-created', '-kind', '-pk')
+POPULAR_ORDERING = ('-hot', '-kind', '-pk')
+
+
+def seek(ordering, position, kind, reverse=False):
+    """
+    The "comes after position" condition of ordering for the half of
+    the union holding `kind`. The kind is the same for every row of a
+    half so its comparison is settled here, which leaves the database
+    a plain range on the leading column of the index, e.g. for
+    ('-created', '-kind', '-pk'):
+
+        created < c                               kind > k
+        created <= c                              kind < k
+        created <= c AND (created < c OR pk < p)  kind = k
+    """
+    field = ordering[0]
+    name = field.lstrip('-')
+    value, position_kind, pk = position
+    lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+    if kind == position_kind:
+        return Q(**{'{}__{}e'.format(name, lookup): value}) & (
+            Q(**{'{}__{}'.format(name, lookup): value}) |
+            Q(**{'pk__{}'.format(lookup): pk})
+        )
+    comes_after = kind < position_kind if lookup == 'lt' else kind > position_kind
+    return Q(**{'{}__{}{}'.format(name, lookup, 'e' if comes_after else ''): value})
+
+
+class MixedFeedPagination(KeysetPagination):
+    """
+    KeysetPagination over a union of one queryset per kind, e.g.
+    {Loanrequest: qs, Savingrequest: qs}. Pages are lists of
+    {name: value, 'kind': kind, 'pk': pk} keys in feed order.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, ordering=ORDERING):
+        super().__init__(self.page_size, ordering=ordering)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_position(self, row):
+        return [row[field.lstrip('-')] for field in self.ordering]
+
+    def clean_position(self, querysets, position):
+        if len(position) != len(self.ordering):
+            raise NotFound(_("Invalid cursor"))
+        model = next(iter(querysets))
+        value, kind, pk = position
+        try:
+            return [
+                model._meta.get_field(self.ordering[0].lstrip('-')).to_python(value),
+                int(kind),
+                int(pk),
+            ]
+        except Exception:
+            raise NotFound(_("Invalid cursor"))
+
+    def paginate_querysets(self, querysets, request):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        token = request.query_params.get(self.cursor_query_param)
+        position, reverse = (None, False)
+        if token:
+            position, reverse = decode_cursor(token)
+            position = self.clean_position(querysets, position)
+
+        names = [field.lstrip('-') for field in self.ordering]
+        halves = []
+        for model, queryset in querysets.items():
+            kind = get_kind(model)
+            queryset = queryset.annotate(kind=Value(kind, output_field=IntegerField()))
+            if position is not None:
+                queryset = queryset.filter(seek(self.ordering, position, kind, reverse))
+            halves.append(queryset.order_by().values(*names))
+
+        if reverse:
+            ordering = [f.lstrip('-') if f.startswith('-') else '-' + f
+                        for f in self.ordering]
+        else:
+            ordering = list(self.ordering)
+        union = halves[0].union(*halves[1:], all=True).order_by(*ordering)
+
+        rows = list(union[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+def load(models, rows):
+    """
+    The objects behind a page of keys, in page order, with one query
+    per kind. Rows deleted since the page was read are left out.
+    """
+    by_kind = {}
+    for model in models:
+        kind = get_kind(model)
+        pks = [row['pk'] for row in rows if row['kind'] == kind]
+        by_kind[kind] = model.objects.with_related().in_bulk(pks) if pks else {}
+    return [
+        by_kind[row['kind']][row['pk']]
+        for row in rows if row['pk'] in by_kind[row['kind']]
+    ]
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import models
+
+from subs.models import Sub
+
+
+class HomeFeedEntry(models.Model):
+    """
+    One loanrequest or savingrequest in one user's home feed. Rows are
+    written by feeds.store when something is posted to a sub the user
+    is a member of, `created` is the post's so a feed reads newest
+    first straight off the (user, kind, created) index.
+    """
+    LOANREQUEST = 1
+    SAVINGREQUEST = 2
+    KIND_CHOICES = (
+        (LOANREQUEST, 'loanrequest'),
+        (SAVINGREQUEST, 'savingrequest'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='home_feed_entries'
+    )
+    sub = models.ForeignKey(Sub, on_delete=models.CASCADE, related_name='+')
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    created = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'kind', 'object_id')
+        indexes = [
+            models.Index(
+                fields=['user', 'kind', 'created', 'object_id'],
+                name='feeds_home_user_created_idx'
+            ),
+            # removing a deleted post from every feed
+            models.Index(fields=['kind', 'object_id'], name='feeds_home_object_idx'),
+        ]
+
+    def __str__(self):
+        return '{} {} for {}'.format(
+            self.get_kind_display(), self.object_id, self.user_id
+        )
@@ -0,0 +1,132 @@
+"""
+The 'popular' pseudo-sub.
+
+Every loanrequest and savingrequest stores a reddit style hot score
+
+    hot = log10(points) + (created - EPOCH) / DECAY
+
+where the points are the member count of the post's sub, there are no
+votes in reReddit so the audience a post reaches stands in for them.
+The time term never changes, a post DECAY seconds newer simply outranks
+one with ten times the points, so a stored score doesn't have to decay
+and only moves when the points do. Reading 'popular' is a backwards
+range scan of the (hot, id) index, paginated by a (hot, pk) cursor.
+
+Posts are scored when they are saved. Joining or leaving a sub
+rescores its posts of the last WINDOW_DAYS, older ones trail by
+WINDOW_DAYS * 86400 / DECAY powers of ten of points and never come back
+up anyway. The log is rounded to PRECISION places, so a single join or
+leave only rewrites the sub's posts when it moves the rounded value,
+with the default that is once per couple of percent of members.
+"""
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.cache import response_cache
+from subs.models import Sub
+from .store import MODELS, chunks
+
+DEFAULTS = {
+    'DECAY': 45000,
+    'WINDOW_DAYS': 7,
+    'PRECISION': 2,
+}
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+ORDERING = ('-hot', '-pk')
+
+BATCH_SIZE = 500
+
+# model label -> the response cache tag of its list views
+CACHE_TAGS = {
+    'loanrequests.loanrequest': 'loanrequests',
+    'savingrequests.savingrequest': 'savingrequests',
+}
+
+
+def get_option(name):
+    return dict(DEFAULTS, **getattr(settings, 'POPULAR_FEED', {}))[name]
+
+
+def weight(members):
+    return round(math.log10(max(members, 1)), get_option('PRECISION'))
+
+
+def hot_score(members, created):
+    return weight(members) + (created - EPOCH).total_seconds() / get_option('DECAY')
+
+
+def score(instance):
+    """Set the hot score of a post about to be saved."""
+    instance.hot = hot_score(instance.subreddit.memberscount, instance.created)
+
+
+def rescore(queryset, batch_size=BATCH_SIZE):
+    """
+    Recompute the hot scores of the posts in `queryset` and store the
+    ones that changed, returns how many did. Walks the posts in pk
+    order a batch at a time so nothing reads a table while it is
+    being written.
+    """
+    model = queryset.model
+    members = dict(Sub.objects.using(queryset.db).filter(
+        pk__in=queryset.order_by().values('subreddit')
+    ).values_list('pk', 'memberscount'))
+    queryset = queryset.only('pk', 'subreddit', 'created', 'hot').order_by('pk')
+    updated = 0
+    last_pk = 0
+    while True:
+        posts = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not posts:
+            return updated
+        changed = []
+        for post in posts:
+            hot = hot_score(members.get(post.subreddit_id, 0), post.created)
+            if post.hot != hot:
+                post.hot = hot
+                changed.append(post)
+        model.objects.using(queryset.db).bulk_update(
+            changed, ['hot'], batch_size=batch_size
+        )
+        updated += len(changed)
+        last_pk = posts[-1].pk
+
+
+def rescore_posts(model, pks):
+    """Score posts written without save(), e.g. by bulk_create."""
+    updated = sum(
+        rescore(model.objects.filter(pk__in=chunk)) for chunk in chunks(pks)
+    )
+    if updated:
+        response_cache.bump(CACHE_TAGS[model._meta.label_lower])
+
+
+def rescore_subs(sub_pks):
+    """Rescore the posts of the last WINDOW_DAYS in these subs."""
+    since = timezone.now() - timedelta(days=get_option('WINDOW_DAYS'))
+    for model in MODELS:
+        updated = sum(
+            rescore(model.objects.filter(subreddit__in=chunk, created__gte=since))
+            for chunk in chunks(sub_pks)
+        )
+        if updated:
+            response_cache.bump(CACHE_TAGS[model._meta.label_lower])
+
+
+def members_changed(sub_pk, change):
+    """
+    A single join (change=1) or leave (change=-1) moved the member
+    count of the sub, rescore its posts if that moved their weight.
+    """
+    members = Sub.objects.filter(pk=sub_pk).values_list('memberscount', flat=True).first()
+    if members is not None and weight(members) != weight(members - change):
+        rescore_subs([sub_pk])
+
+
+def rescore_all(using='default'):
+    """Score every post again, e.g. after changing POPULAR_FEED."""
+    return sum(rescore(model.objects.using(using).all()) for model in MODELS)
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from redditors.models import UserSubMembership
+from utilities.bulk import post_bulk_create, post_bulk_delete, post_bulk_update
+from . import popular, store
+
+
+def score_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        popular.score(instance)
+
+
+def score_posts(sender, instances, **kwargs):
+    popular.rescore_posts(sender, [instance.pk for instance in instances])
+
+
+# what decides which feeds hold a post and where
+FEED_FIELDS = ('subreddit', 'created')
+
+
+def remember_feed_position(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Before an update, note the sub and created the post's feed entries
+    were written for, so fan_out_post can tell whether it moved.
+    """
+    if raw or instance._state.adding or not store.get_option('ENABLED'):
+        return
+    if update_fields is not None and not set(FEED_FIELDS) & set(update_fields):
+        return
+    instance._feed_position = sender.objects.filter(pk=instance.pk).values_list(
+        'subreddit_id', 'created'
+    ).first()
+
+
+def fan_out_post(sender, instance, created=False, **kwargs):
+    if not store.get_option('ENABLED'):
+        return
+    pk = instance.pk
+    if not created:
+        position = instance.__dict__.pop('_feed_position', None)
+        if position is not None and position != (instance.subreddit_id, instance.created):
+            transaction.on_commit(lambda: store.move_posts(sender, [pk]))
+        return
+    trim = pk % store.get_option('TRIM_EVERY') == 0
+    # after the commit, a rolled back post must not reach any feed
+    transaction.on_commit(lambda: store.fan_out(sender, [pk], trim=trim))
+
+
+def fan_out_posts(sender, instances, **kwargs):
+    if not store.get_option('ENABLED'):
+        return
+    pks = [instance.pk for instance in instances]
+    transaction.on_commit(lambda: store.fan_out(sender, pks))
+
+
+def update_posts(sender, instances, fields=(), **kwargs):
+    """
+    bulk_update_with_signal, e.g. an import, may have moved posts to
+    other subs or given them another created.
+    """
+    if not set(FEED_FIELDS) & set(fields):
+        return
+    pks = [instance.pk for instance in instances]
+    popular.rescore_posts(sender, pks)
+    if store.get_option('ENABLED'):
+        transaction.on_commit(lambda: store.move_posts(sender, pks))
+
+
+def remove_post(sender, instance, **kwargs):
+    store.remove_posts(sender, [instance.pk])
+
+
+def join_sub(sender, instance, created=False, **kwargs):
+    if not created:
+        return
+    popular.members_changed(instance.sub_id, 1)
+    if store.get_option('ENABLED'):
+        pair = (instance.user_id, instance.sub_id)
+        transaction.on_commit(lambda: store.backfill([pair]))
+
+
+def join_subs(sender, instances, **kwargs):
+    popular.rescore_subs({instance.sub_id for instance in instances})
+    if store.get_option('ENABLED'):
+        pairs = [(instance.user_id, instance.sub_id) for instance in instances]
+        transaction.on_commit(lambda: store.backfill(pairs))
+
+
+def leave_sub(sender, instance, **kwargs):
+    popular.members_changed(instance.sub_id, -1)
+    store.remove_memberships([(instance.user_id, instance.sub_id)])
+
+
+def leave_subs(sender, instances, **kwargs):
+    popular.rescore_subs({instance.sub_id for instance in instances})
+    store.remove_memberships(
+        [(instance.user_id, instance.sub_id) for instance in instances]
+    )
+
+
+def connect_signals():
+    for model in store.MODELS:
+        label = model._meta.label_lower
+        pre_save.connect(
+            score_post,
+            sender=model,
+            dispatch_uid='popular-score-{}'.format(label)
+        )
+        post_bulk_create.connect(
+            score_posts,
+            sender=model,
+            dispatch_uid='popular-bulk-score-{}'.format(label)
+        )
+        pre_save.connect(
+            remember_feed_position,
+            sender=model,
+            dispatch_uid='home-feed-pre-save-{}'.format(label)
+        )
+        post_save.connect(
+            fan_out_post,
+            sender=model,
+            dispatch_uid='home-feed-save-{}'.format(label)
+        )
+        post_bulk_create.connect(
+            fan_out_posts,
+            sender=model,
+            dispatch_uid='home-feed-bulk-create-{}'.format(label)
+        )
+        post_bulk_update.connect(
+            update_posts,
+            sender=model,
+            dispatch_uid='home-feed-bulk-update-{}'.format(label)
+        )
+        post_delete.connect(
+            remove_post,
+            sender=model,
+            dispatch_uid='home-feed-delete-{}'.format(label)
+        )
+    post_save.connect(
+        join_sub, sender=UserSubMembership, dispatch_uid='home-feed-join'
+    )
+    post_bulk_create.connect(
+        join_subs, sender=UserSubMembership, dispatch_uid='home-feed-bulk-join'
+    )
+    post_delete.connect(
+        leave_sub, sender=UserSubMembership, dispatch_uid='home-feed-leave'
+    )
+    post_bulk_delete.connect(
+        leave_subs, sender=UserSubMembership, dispatch_uid='home-feed-bulk-leave'
+    )
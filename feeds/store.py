@@ -0,0 +1,242 @@
+"""
+The materialized home feed.
+
+Posting to a sub copies a HomeFeedEntry into the feed of every member
+(fan-out on write) with one INSERT ... SELECT, so building 'home' is a
+range scan over the reader's own entries instead of a filter over all
+loanrequests of every sub they are in followed by a sort.
+
+Subs with more than FANOUT_MAX_MEMBERS members are not fanned out, one
+post would mean that many rows. Their posts are merged in when the
+feed is read (merge-on-read) through the (subreddit, created, id)
+index. Every feed keeps its newest MAX_ENTRIES entries per kind, older
+ones are trimmed after bulk inserts, on every TRIM_EVERY-th post and
+by the rebuild_home_feeds command.
+
+Joining a sub copies its newest posts into the new member's feed,
+leaving removes them. A post moved to another sub, or given another
+created, is taken out of every feed and fanned out again. A sub that
+grows past FANOUT_MAX_MEMBERS stops being fanned out at once. One that
+shrinks below it only has its new posts in the feeds until
+rebuild_home_feeds runs.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from loanrequests.models import Loanrequest
+from redditors.models import UserSubMembership
+from savingrequests.models import Savingrequest
+from subs.models import Sub
+from .models import HomeFeedEntry
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 500,
+    'FANOUT_MAX_MEMBERS': 5000,
+    'TRIM_EVERY': 50,
+}
+
+# model label -> HomeFeedEntry.kind
+KINDS = {
+    'loanrequests.loanrequest': HomeFeedEntry.LOANREQUEST,
+    'savingrequests.savingrequest': HomeFeedEntry.SAVINGREQUEST,
+}
+MODELS = (Loanrequest, Savingrequest)
+
+# ids per statement, below SQLite's 999 parameter limit
+CHUNK_SIZE = 500
+
+
+def get_option(name):
+    return dict(DEFAULTS, **getattr(settings, 'HOME_FEED', {}))[name]
+
+
+def get_kind(model):
+    return KINDS[model._meta.label_lower]
+
+
+def chunks(values, size=CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def tables(conn, model=None):
+    quote = conn.ops.quote_name
+    names = {
+        'feed': quote(HomeFeedEntry._meta.db_table),
+        'membership': quote(UserSubMembership._meta.db_table),
+        'sub': quote(Sub._meta.db_table),
+    }
+    if model is not None:
+        names['post'] = quote(model._meta.db_table)
+    return names
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def fan_out(model, pks, trim=True, conn=None):
+    """
+    Add the posts to the feeds of the members of their subs, except
+    for the subs too big to fan out.
+    """
+    conn = conn or connection
+    names = tables(conn, model)
+    sub_pks = set()
+    with conn.cursor() as cursor:
+        for chunk in chunks(pks):
+            cursor.execute(
+                "INSERT INTO {feed} (user_id, sub_id, kind, object_id, created) "
+                "SELECT m.user_id, p.subreddit_id, %s, p.id, p.created "
+                "FROM {post} p "
+                "JOIN {membership} m ON m.sub_id = p.subreddit_id "
+                "JOIN {sub} s ON s.id = p.subreddit_id "
+                "WHERE p.id IN ({ids}) AND s.memberscount <= %s "
+                "ON CONFLICT DO NOTHING".format(ids=placeholders(chunk), **names),
+                [get_kind(model)] + chunk + [get_option('FANOUT_MAX_MEMBERS')]
+            )
+            if trim:
+                sub_pks.update(
+                    model.objects.filter(pk__in=chunk).values_list('subreddit_id', flat=True)
+                )
+    if trim and sub_pks:
+        trim_members(sub_pks, conn)
+
+
+def backfill(pairs, conn=None):
+    """
+    Copy the newest posts of a sub into the feed of a new member,
+    `pairs` are (user pk, sub pk).
+    """
+    conn = conn or connection
+    limit = get_option('MAX_ENTRIES')
+    user_pks = set()
+    with conn.cursor() as cursor:
+        for model in MODELS:
+            names = tables(conn, model)
+            for user_pk, sub_pk in pairs:
+                cursor.execute(
+                    "INSERT INTO {feed} (user_id, sub_id, kind, object_id, created) "
+                    "SELECT %s, p.subreddit_id, %s, p.id, p.created "
+                    "FROM {post} p JOIN {sub} s ON s.id = p.subreddit_id "
+                    "WHERE p.subreddit_id = %s AND s.memberscount <= %s "
+                    "ORDER BY p.created DESC, p.id DESC LIMIT %s "
+                    "ON CONFLICT DO NOTHING".format(**names),
+                    [user_pk, get_kind(model), sub_pk,
+                     get_option('FANOUT_MAX_MEMBERS'), limit]
+                )
+                user_pks.add(user_pk)
+    trim_users(user_pks, conn)
+
+
+def remove_memberships(pairs):
+    """Take a sub's posts out of the feed of a member who left it."""
+    by_sub = {}
+    for user_pk, sub_pk in pairs:
+        by_sub.setdefault(sub_pk, set()).add(user_pk)
+    for sub_pk, user_pks in by_sub.items():
+        for chunk in chunks(user_pks):
+            HomeFeedEntry.objects.filter(sub=sub_pk, user__in=chunk).delete()
+
+
+def remove_posts(model, pks):
+    for chunk in chunks(pks):
+        HomeFeedEntry.objects.filter(kind=get_kind(model), object_id__in=chunk).delete()
+
+
+def move_posts(model, pks, conn=None):
+    """
+    Fan posts out again after they moved to another sub or got another
+    created, their entries are in the wrong feeds or out of order.
+    """
+    remove_posts(model, pks)
+    fan_out(model, pks, conn=conn)
+
+
+def trim(where='', params=(), conn=None):
+    """
+    Delete all but the newest MAX_ENTRIES entries per user and kind of
+    the feeds matching the optional `where` condition.
+    """
+    conn = conn or connection
+    names = tables(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM {feed} WHERE id IN ("
+            "SELECT id FROM ("
+            "SELECT id, ROW_NUMBER() OVER ("
+            "PARTITION BY user_id, kind ORDER BY created DESC, object_id DESC"
+            ") AS position FROM {feed} {where}"
+            ") ranked WHERE position > %s)".format(where=where, **names),
+            list(params) + [get_option('MAX_ENTRIES')]
+        )
+        return cursor.rowcount
+
+
+def trim_users(user_pks, conn=None):
+    for chunk in chunks(user_pks):
+        trim('WHERE user_id IN ({})'.format(placeholders(chunk)), chunk, conn)
+
+
+def trim_members(sub_pks, conn=None):
+    conn = conn or connection
+    for chunk in chunks(sub_pks):
+        trim(
+            'WHERE user_id IN (SELECT user_id FROM {membership} '
+            'WHERE sub_id IN ({ids}))'.format(
+                ids=placeholders(chunk), **tables(conn)
+            ),
+            chunk,
+            conn
+        )
+
+
+def rebuild(conn=None):
+    """
+    Drop every feed and fan out the newest MAX_ENTRIES posts per user
+    and kind again, e.g. after turning the feed on or changing
+    FANOUT_MAX_MEMBERS.
+    """
+    conn = conn or connection
+    HomeFeedEntry.objects.using(conn.alias).all().delete()
+    with conn.cursor() as cursor:
+        for model in MODELS:
+            cursor.execute(
+                "INSERT INTO {feed} (user_id, sub_id, kind, object_id, created) "
+                "SELECT user_id, sub_id, %s, object_id, created FROM ("
+                "SELECT m.user_id, p.subreddit_id AS sub_id, p.id AS object_id, "
+                "p.created, ROW_NUMBER() OVER ("
+                "PARTITION BY m.user_id ORDER BY p.created DESC, p.id DESC"
+                ") AS position "
+                "FROM {post} p "
+                "JOIN {membership} m ON m.sub_id = p.subreddit_id "
+                "JOIN {sub} s ON s.id = p.subreddit_id "
+                "WHERE s.memberscount <= %s"
+                ") ranked WHERE position <= %s".format(**tables(conn, model)),
+                [get_kind(model), get_option('FANOUT_MAX_MEMBERS'),
+                 get_option('MAX_ENTRIES')]
+            )
+    return HomeFeedEntry.objects.using(conn.alias).count()
+
+
+def filter_home_feed(queryset, user):
+    """
+    Narrow a Loanrequest or Savingrequest queryset down to the home
+    feed of `user`: the fanned out entries plus, merged on read, the
+    posts of the user's subs that are too big to fan out.
+    """
+    if not get_option('ENABLED'):
+        return queryset.filter(subreddit__in=user.subs.get_queryset().order_by('pk'))
+    entries = HomeFeedEntry.objects.filter(
+        user=user, kind=get_kind(queryset.model)
+    ).order_by('-created', '-object_id').values('object_id')[:get_option('MAX_ENTRIES')]
+    big_subs = list(user.subs.filter(
+        memberscount__gt=get_option('FANOUT_MAX_MEMBERS')
+    ).values_list('pk', flat=True))
+    if not big_subs:
+        # the common case, an OR would keep SQLite off the index
+        return queryset.filter(pk__in=entries)
+    return queryset.filter(Q(pk__in=entries) | Q(subreddit__in=big_subs))
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path(
+        'subreddit-list/<slug:sub_title>/',
+        views.SubMixedFeedView.as_view(),
+        name='sub-mixed-feed'
+    ),
+    path(
+        'user-list/<slug:username>/',
+        views.UserMixedFeedView.as_view(),
+        name='user-mixed-feed'
+    ),
+]
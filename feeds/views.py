@@ -0,0 +1,128 @@
+from collections import OrderedDict
+
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework.views import APIView
+
+from core.cache import CachedResponseMixin
+from core.signals import sub_tag
+from loanrequests.models import Loanrequest
+from loanrequests.serializers import LoanrequestSerializer
+from redditors.models import User
+from savingrequests.models import Savingrequest
+from savingrequests.serializers import SavingrequestSerializer
+from subs.models import Sub
+from .mixed import ORDERING, POPULAR_ORDERING, MixedFeedPagination, load
+from .models import HomeFeedEntry
+from .store import filter_home_feed, get_kind
+
+SERIALIZERS = OrderedDict((
+    (Loanrequest, LoanrequestSerializer),
+    (Savingrequest, SavingrequestSerializer),
+))
+
+KIND_NAMES = dict(HomeFeedEntry.KIND_CHOICES)
+
+
+class MixedFeedView(CachedResponseMixin, APIView):
+    """
+    Base view for the feeds of loanrequests and savingrequests
+    interleaved, newest first, paginated by an opaque ?cursor= and
+    ?page_size= up to 100. Every item is the kind's usual
+    representation plus its 'kind'.
+
+    Subclasses return one queryset per model from get_querysets().
+    """
+    ordering = ORDERING
+    cache_tags = ('loanrequests', 'savingrequests')
+
+    def get_querysets(self):
+        raise NotImplementedError
+
+    def get_ordering(self):
+        return self.ordering
+
+    def get(self, request, *args, **kwargs):
+        querysets = self.get_querysets()
+        paginator = MixedFeedPagination(self.get_ordering())
+        rows = paginator.paginate_querysets(querysets, request)
+        context = {'request': request, 'view': self}
+        data = []
+        for instance in load(querysets.keys(), rows):
+            item = SERIALIZERS[type(instance)](instance, context=context).data
+            item['kind'] = KIND_NAMES[get_kind(type(instance))]
+            data.append(item)
+        return paginator.get_paginated_response(data)
+
+
+class SubMixedFeedView(MixedFeedView):
+    """
+    Loanrequests and savingrequests of a sub or of one of the
+    pseudo-subreddits. 'popular' is ordered by hot score instead.
+    """
+
+    def get_sub_title(self):
+        return self.kwargs.get('sub_title', '').lower()
+
+    def get_cache_tags(self):
+        """Like the single kind sub lists, 'home' is never cached."""
+        sub_title = self.get_sub_title()
+        if sub_title == 'home':
+            return []
+        if sub_title in Sub.pseudo_subreddits:
+            return list(self.cache_tags)
+        return list(self.cache_tags) + [sub_tag(sub_title)]
+
+    def get_ordering(self):
+        if self.get_sub_title() == 'popular':
+            return POPULAR_ORDERING
+        return self.ordering
+
+    def get_querysets(self):
+        sub_title = self.get_sub_title()
+        if sub_title in Sub.pseudo_subreddits:
+            return getattr(self, "get_{}_querysets".format(sub_title))()
+        try:
+            sub = Sub.objects.get(title=self.kwargs.get('sub_title'))
+        except Sub.DoesNotExist:
+            message = _("The '{}' subreddit does not exist".format(
+                self.kwargs.get('sub_title')
+            ))
+            raise exceptions.NotFound(message)
+        return OrderedDict(
+            (model, model.objects.filter(subreddit=sub)) for model in SERIALIZERS
+        )
+
+    def get_home_querysets(self):
+        """
+        The user's materialized home feeds, or everything when they
+        aren't signed in.
+        """
+        user = self.request.user
+        if user and user.is_authenticated:
+            return OrderedDict(
+                (model, filter_home_feed(model.objects.all(), user))
+                for model in SERIALIZERS
+            )
+        return self.get_all_querysets()
+
+    def get_popular_querysets(self):
+        return self.get_all_querysets()
+
+    def get_all_querysets(self):
+        return OrderedDict((model, model.objects.all()) for model in SERIALIZERS)
+
+
+class UserMixedFeedView(MixedFeedView):
+    """Loanrequests and savingrequests posted by a user."""
+
+    def get_querysets(self):
+        username = self.kwargs.get('username')
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            message = _("The '{}' user does not exist".format(username))
+            raise exceptions.NotFound(message)
+        return OrderedDict(
+            (model, model.objects.filter(authorsender=user)) for model in SERIALIZERS
+        )
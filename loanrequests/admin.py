@@ -2,6 +2,7 @@ from django.contrib import admin
 from import_export.admin import ImportExportModelAdmin
 
 from .models import Loanrequest
+from .resources import LoanrequestResource
 
 
 # admin.site.register(Loanrequest)
@@ -9,4 +10,6 @@ from .models import Loanrequest
 
 @admin.register(Loanrequest)
 class LoanrequestAdmin(ImportExportModelAdmin):
-    pass
+    resource_class = LoanrequestResource
+    # one LogEntry insert per row would undo the bulk writes
+    skip_admin_log = True
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanrequests', '0002_auto_20200802_1010'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanrequest',
+            index=models.Index(fields=['authorsender', 'created'], name='loanreq_author_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanrequests', '0003_author_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='loanrequest',
+            name='loanreq_author_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='loanrequest',
+            index=models.Index(fields=['subreddit', 'created', 'id'], name='loanreq_sub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanrequest',
+            index=models.Index(fields=['authorsender', 'created', 'id'], name='loanreq_auth_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanrequest',
+            index=models.Index(fields=['created', 'id'], name='loanreq_created_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanrequests', '0004_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanrequest',
+            name='hot',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='loanrequest',
+            index=models.Index(fields=['hot', 'id'], name='loanreq_hot_idx'),
+        ),
+    ]
@@ -13,6 +13,16 @@ from subs.models import Sub
 #         return super().get_queryset().prefetch_related('votes')
 
 
+class LoanrequestQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Join the subreddit and authorsender in the base query, the
+        serializer reads both for every row so without this a list
+        page costs two extra queries per loanrequest.
+        """
+        return self.select_related('subreddit', 'authorsender')
+
+
 class Loanrequest(models.Model):
     # This is the default because it is not very common to
     # not need to calculate upvotes and that will result in
@@ -20,6 +30,7 @@ class Loanrequest(models.Model):
     # objects = LoanrequestVotesManager()
 
     # objects_no_votes = models.Manager()
+    objects = LoanrequestQuerySet.as_manager()
 
     # set default so that management command can overwrite
     created = models.DateTimeField(default=timezone.now)
@@ -55,6 +66,10 @@ class Loanrequest(models.Model):
         related_name="loanrequests"
     )
 
+    # Stored hot score of the 'popular' pseudo-sub, kept up to date
+    # by feeds.popular as posts are made and members come and go
+    hot = models.FloatField(default=0, editable=False)
+
     # voters = models.ManyToManyField(
     #     User,
     #     through='votes.LoanrequestVote',
@@ -70,5 +85,32 @@ class Loanrequest(models.Model):
     #     """
     #     return sum([vote.vote_type for vote in self.votes.all()])
 
+    class Meta:
+        # every feed is read newest first as ('-created', '-pk'), see
+        # utilities.filters.IndexedOrderingFilter, these let the
+        # database walk an index instead of sorting the matching rows
+        indexes = [
+            # sub pages
+            models.Index(
+                fields=['subreddit', 'created', 'id'],
+                name='loanreq_sub_created_idx'
+            ),
+            # profile sections and user feeds
+            models.Index(
+                fields=['authorsender', 'created', 'id'],
+                name='loanreq_auth_created_idx'
+            ),
+            # 'all' and the unfiltered list
+            models.Index(
+                fields=['created', 'id'],
+                name='loanreq_created_idx'
+            ),
+            # 'popular', read as ('-hot', '-pk')
+            models.Index(
+                fields=['hot', 'id'],
+                name='loanreq_hot_idx'
+            ),
+        ]
+
     def __str__(self):
         return str(self.title)
@@ -2,10 +2,10 @@
 #
 #
 # # class PostListPagination(LimitOffsetPagination):
-from rest_framework.pagination import PageNumberPagination
+from utilities.pagination import FeedPagination
 
 
-class LoanrequestListPagination(PageNumberPagination):
+class LoanrequestListPagination(FeedPagination):
     # default_limit = 20
     # default_limit = 3
     # max_limit = 100
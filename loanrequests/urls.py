@@ -6,6 +6,8 @@ from . import views
 urlpatterns = [
     path('', views.LoanrequestListView.as_view(), name='loanrequest-list'),
     path('<int:pk>/', views.LoanrequestDetailView.as_view(), name='loanrequest-detail'),
+    path('bulk/', views.LoanrequestBulkCreateView.as_view(), name='loanrequest-bulk-create'),
+    path('export/', views.LoanrequestExportView.as_view(), name='loanrequest-export'),
     path(
         'subreddit-list/<slug:sub_title>/',
         views.SubLoanrequestListView.as_view(),
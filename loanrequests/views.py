@@ -1,7 +1,6 @@
 from django.db.models import Sum
 from django.utils.translation import gettext as _
 from rest_framework import status, exceptions
-from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import (
     ListAPIView,
     RetrieveUpdateDestroyAPIView,
@@ -12,26 +11,38 @@ from rest_framework.response import Response
 
 from loanrequests.pagination import LoanrequestListPagination
 from redditors.models import User
+from core.bulk import BulkRequestCreateView
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.export import ExportView
+from core.signals import sub_tag
+from feeds import popular
+from feeds.store import filter_home_feed
+from search.filters import FullTextSearchFilter
 from subs.models import Sub
+from utilities.filters import IndexedOrderingFilter
 from .models import Loanrequest
 from .permissions import IsauthorsenderOrModOrAdminOrReadOnly
-from .serializers import LoanrequestSerializer
+from .serializers import LoanrequestSerializer, LoanrequestBulkItemSerializer
 
 
-class LoanrequestListView(ListAPIView):
+class LoanrequestListView(ConditionalGetMixin, CachedResponseMixin, ListAPIView):
     """
     Standard list view for loanrequests
     
     query parameter: username
     """
     # queryset = Post.objects.all()
-    queryset = Loanrequest.objects.get_queryset().order_by('pk')
+    queryset = Loanrequest.objects.with_related().order_by('pk')
     serializer_class = LoanrequestSerializer
     pagination_class = LoanrequestListPagination
     # pagination_class = PageNumberPagination
-    filter_backends = (SearchFilter, OrderingFilter)
+    filter_backends = (FullTextSearchFilter, IndexedOrderingFilter)
     search_fields = ('title', 'body')
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    # logged in readers are few, the anonymous pages are the hot ones
+    cache_tags = ('loanrequests',)
+    cache_anonymous_only = True
 
     def get_serializer_context(self):
         """
@@ -50,20 +61,20 @@ class LoanrequestListView(ListAPIView):
         return context
 
 
-class LoanrequestDetailView(RetrieveUpdateDestroyAPIView):
-    queryset = Loanrequest.objects.all()
+class LoanrequestDetailView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
+    queryset = Loanrequest.objects.with_related()
     serializer_class = LoanrequestSerializer
     permission_classes = (IsauthorsenderOrModOrAdminOrReadOnly,)
 
 
-class UserLoanrequestListView(ListAPIView):
+class UserLoanrequestListView(ConditionalGetMixin, ListAPIView):
     """
     For a particular user return list of all subscribed subreddits.
     """
     serializer_class = LoanrequestSerializer
     pagination_class = LoanrequestListPagination
     # pagination_class = PageNumberPagination
-    filter_backends = (SearchFilter, OrderingFilter)
+    filter_backends = (FullTextSearchFilter, IndexedOrderingFilter)
     search_fields = ('title', 'body')
 
     def get_queryset(self):
@@ -85,7 +96,7 @@ class UserLoanrequestListView(ListAPIView):
             ))
             raise exceptions.NotFound(message)
         # qs = user.subs.all()
-        qs = user.loanrequests.get_queryset().order_by('pk')
+        qs = user.loanrequests.with_related().order_by('pk')
         return qs
 
 
@@ -185,7 +196,22 @@ class LoanrequestToSubredditWithUsernameParamView(CreateAPIView):
         )
 
 
-class SubLoanrequestListView(ListAPIView):
+class LoanrequestBulkCreateView(BulkRequestCreateView):
+    """
+    Batch version of LoanrequestToSubredditWithUsernameParamView for
+    integrations submitting many loanrequests at once.
+    """
+    serializer_class = LoanrequestBulkItemSerializer
+
+
+class LoanrequestExportView(ExportView):
+    """
+    Streaming CSV/NDJSON dump of loanrequests, for admins.
+    """
+    export_name = 'loanrequests'
+
+
+class SubLoanrequestListView(ConditionalGetMixin, CachedResponseMixin, ListAPIView):
     """
     For a particular sub return list of all loanrequests.
     Posts can be ordered with optional GET parameter 'orderby'.
@@ -196,9 +222,31 @@ class SubLoanrequestListView(ListAPIView):
     serializer_class = LoanrequestSerializer
     pagination_class = LoanrequestListPagination
     # pagination_class = PageNumberPagination
-    filter_backends = (SearchFilter, OrderingFilter)
+    filter_backends = (FullTextSearchFilter, IndexedOrderingFilter)
     search_fields = ('title', 'body')
 
+    @property
+    def cursor_ordering(self):
+        """
+        'popular' pages through its (hot, pk) index, everything else
+        keeps the paginator's newest first cursor.
+        """
+        if self.kwargs.get('sub_title', '').lower() == 'popular':
+            return popular.ORDERING
+        return None
+
+    def get_cache_tags(self):
+        """
+        Cache 'all' and the real subs. 'home' is different for every
+        logged in user so it always goes to the database.
+        """
+        subreddit_title = self.kwargs.get('sub_title', '').lower()
+        if subreddit_title == 'home':
+            return []
+        if subreddit_title in Sub.pseudo_subreddits:
+            return ['loanrequests']
+        return ['loanrequests', sub_tag(subreddit_title)]
+
     # def get_sort_function(self):
     #     """
     #     Given an api sort description (e.g. 'popular' or 'new') return
@@ -237,7 +285,7 @@ class SubLoanrequestListView(ListAPIView):
                 ))
                 raise exceptions.NotFound(message)
             # qs = subreddit.loanrequests.all()
-            qs = subreddit.loanrequests.get_queryset().order_by('pk')
+            qs = subreddit.loanrequests.with_related().order_by('pk')
         return qs
 
     def get_home_queryset(self):
@@ -249,26 +297,21 @@ class SubLoanrequestListView(ListAPIView):
         of all loanrequests.
         """
         if self.request.user and self.request.user.is_authenticated:
-            return Loanrequest.objects.filter(
-                # subreddit__in=self.request.user.subs.all()
-                subreddit__in=self.request.user.subs.get_queryset().order_by('pk')
-            )
+            # read from the materialized feed, see feeds.store
+            return filter_home_feed(
+                Loanrequest.objects.with_related(), self.request.user
+            ).order_by('-created', '-pk')
 
         # return all loanrequests if unauthed
         # return Post.objects.all()
-        return Loanrequest.objects.get_queryset().order_by('pk')
+        return Loanrequest.objects.with_related().order_by('pk')
 
-    # def get_popular_queryset(self):
-    #     """
-    #     Create a list of loanrequests popular loanrequests on the fly that serves as the
-    #     'Popular' psuedo subreddit.
-    #     """
-    #     # Arbitrary popularity limit
-    #     popularity_limit = 1
-    #
-    #     return Loanrequest.objects.annotate(
-    #         custom_upvotes=Sum("votes__vote_type")
-    #     ).filter(custom_upvotes__gt=popularity_limit)
+    def get_popular_queryset(self):
+        """
+        Get the loanrequests of the psuedo-subreddit 'Popular', highest
+        stored hot score first, see feeds.popular.
+        """
+        return Loanrequest.objects.with_related().order_by(*popular.ORDERING)
 
     def get_all_queryset(self):
         """
@@ -278,4 +321,4 @@ class SubLoanrequestListView(ListAPIView):
         use popular for now.
         """
         # return Post.objects.all()
-        return Loanrequest.objects.get_queryset().order_by('pk')
+        return Loanrequest.objects.with_related().order_by('pk')
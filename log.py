@@ -1,10 +1,50 @@
+"""
+Logging for the project.
+
+setup_logger() hands every record to a queue, a single background
+thread (a QueueListener) does the formatting and the writes to stderr.
+Request threads only pay for putting a record on the queue, they
+never block on the stream.
+
+Handlers are set up once per process however many modules call
+setup_logger(). The output is colored for development or one json
+object per line for production (LOG_FORMAT = 'json'), and
+sampled_logger() gives a child logger that keeps only a fraction of
+its DEBUG/INFO records for the high volume per-request lines.
+"""
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
 from colorlog import ColoredFormatter
 
+LOGGER_NAME = 'shen-yue-is-beautiful'
 
-def setup_logger():
-    """Return a logger with a default ColoredFormatter."""
-    formatter = ColoredFormatter(
+_lock = threading.Lock()
+_listener = None
+
+
+def get_option(name, default):
+    """
+    Read an option from the django settings when they are configured,
+    otherwise from the environment so this still works standalone.
+    """
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return os.environ.get(name, default)
+
+
+def colored_formatter():
+    return ColoredFormatter(
         (
             '%(log_color)s%(levelname)-5s%(reset)s '
             '%(yellow)s[%(asctime)s]%(reset)s'
@@ -21,12 +61,105 @@ def setup_logger():
         }
     )
 
-    logger = logging.getLogger('shen-yue-is-beautiful')
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    logger.setLevel(logging.DEBUG)
 
+class JsonFormatter(logging.Formatter):
+    """One json object per record, for log collectors."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through every WARNING and above but only a `rate` fraction
+    of the records below that.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class MessageQueueHandler(QueueHandler):
+    """
+    QueueHandler that only merges the message arguments before the
+    record crosses threads. The stdlib one also formats the record
+    in the calling thread which is the work we want off it.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _start_listener(logger):
+    global _listener
+    if get_option('LOG_FORMAT', 'color') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = colored_formatter()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    records = queue.Queue(-1)
+    logger.addHandler(MessageQueueHandler(records))
+    _listener = QueueListener(records, stream_handler)
+    _listener.start()
+    # flush what is still queued when the process exits
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def setup_logger():
+    """Return the project logger, configuring it on first use."""
+    logger = logging.getLogger(LOGGER_NAME)
+    with _lock:
+        if _listener is None:
+            _start_listener(logger)
+            logger.setLevel(get_option('LOG_LEVEL', 'DEBUG'))
+    return logger
+
+
+def sampled_logger(name, rate=None):
+    """
+    Child logger of the project logger for per-request lines,
+    keeping only `rate` (LOG_SAMPLE_RATE by default) of its
+    DEBUG/INFO records.
+    """
+    setup_logger()
+    logger = logging.getLogger('{}.{}'.format(LOGGER_NAME, name))
+    if rate is None:
+        rate = get_option('LOG_SAMPLE_RATE', 1.0)
+    with _lock:
+        for log_filter in list(logger.filters):
+            if isinstance(log_filter, SamplingFilter):
+                logger.removeFilter(log_filter)
+        logger.addFilter(SamplingFilter(rate))
     return logger
 
 
@@ -42,4 +175,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
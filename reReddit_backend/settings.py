@@ -30,12 +30,95 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         # 'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'redditors.authentication.CachedTokenAuthentication',
     )
 }
 
+# log.setup_logger: 'color' for development, 'json' for production.
+# LOG_SAMPLE_RATE is the fraction of per-request DEBUG/INFO lines kept.
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'color')
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+
+# Response cache for the hot read endpoints (core.cache). Entries are
+# invalidated by signals in the process making the write, so with more
+# than one worker CACHE_ALIAS has to name a cache shared between them.
+# ENABLED None turns it on only for such a cache, not for the default
+# per process local memory cache.
+RESPONSE_CACHE = {
+    'ENABLED': None,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60,
+    'KEY_PREFIX': 'response',
+}
+
+# Request metrics served at /stats/metrics/ (core.metrics). With more
+# than one worker process DIRECTORY has to be set, every process writes
+# its totals there and the endpoint adds them up. Prometheus scrapes
+# with "Authorization: Bearer <AUTH_TOKEN>", staff users need none.
+METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': os.environ.get('METRICS_DIR'),
+    'FLUSH_INTERVAL': 1,
+    'AUTH_TOKEN': os.environ.get('METRICS_AUTH_TOKEN'),
+}
+
+# Slow query log (core.slowlog), off unless SLOW_QUERY_LOG=1. Queries
+# over THRESHOLD_MS in a SAMPLE_RATE share of the requests are kept
+# with their EXPLAIN plan, see /stats/slow-queries/ and FILE.
+SLOW_QUERY_LOG = {
+    'ENABLED': os.environ.get('SLOW_QUERY_LOG') == '1',
+    'THRESHOLD_MS': float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100')),
+    'SAMPLE_RATE': float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', '1.0')),
+    'EXPLAIN': True,
+    'EXPLAIN_INTERVAL': 60,
+    'BUFFER_SIZE': 200,
+    'FILE': os.environ.get('SLOW_QUERY_LOG_FILE'),
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+}
+
+# Materialized home feeds (feeds.store): posts are copied into the
+# feed of every member of their sub unless it has more than
+# FANOUT_MAX_MEMBERS members, those are merged in when read. Feeds keep
+# their newest MAX_ENTRIES entries per kind.
+HOME_FEED = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 500,
+    'FANOUT_MAX_MEMBERS': 5000,
+    'TRIM_EVERY': 50,
+}
+
+# Stored hot scores of the 'popular' pseudo-sub (feeds.popular):
+# log10(sub members, rounded to PRECISION places) + age / DECAY seconds.
+# Joining or leaving a sub rescores its posts of the last WINDOW_DAYS.
+POPULAR_FEED = {
+    'DECAY': 45000,
+    'WINDOW_DAYS': 7,
+    'PRECISION': 2,
+}
+
+# Largest batch accepted by the loanrequests/savingrequests bulk endpoints
+BULK_CREATE_MAX_ITEMS = 5000
+
+# Largest batch accepted by the subs bulk subscribe endpoint
+BULK_SUBSCRIBE_MAX_ITEMS = 500
+
+# In-process token key -> user cache used by CachedTokenAuthentication
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+}
+
 CORS_ORIGIN_ALLOW_ALL = True
 
+# Seconds a "is this user a member of that sub" answer is cached, only
+# when the default cache is shared between worker processes
+MEMBERSHIP_CACHE_TIMEOUT = 60
+
+# Threads used to run the SearchView lookups side by side, 1 disables
+SEARCH_CONCURRENCY = 4
+
 BLEACH_ALLOWED_TAGS = [
     'a', 'abbr', 'acronym', 'b', 'blockquote', 'code', 'em', 'i', 'li',
     'ol', 'strong', 'ul', 'p', 'h1', 'h2', 'br', 's', 'u'
@@ -65,11 +148,15 @@ INSTALLED_APPS = [
     'redditors.apps.RedditorsConfig',
     'loanrequests',
     'savingrequests',
-    'core',
+    'core.apps.CoreConfig',
+    'search.apps.SearchConfig',
+    'feeds.apps.FeedsConfig',
     'import_export',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
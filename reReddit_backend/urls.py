@@ -39,5 +39,7 @@ urlpatterns = [
     path('savingrequests/', include('savingrequests.urls')),
     # path('vote/', include('votes.urls')),
     path('search/', include('search.urls')),
+    path('feeds/', include('feeds.urls')),
+    path('stats/', include('core.urls')),
     path('api-auth/', include('rest_framework.urls')),
 ]
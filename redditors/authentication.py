@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+
+class TokenCache:
+    """
+    Bounded LRU of token key -> (user row, token row) with a TTL.
+
+    Rows are stored as plain field values and every hit builds fresh
+    model instances from them, so one request changing request.user
+    in memory can't leak into another request.
+    The cache lives in the worker process: the signals below drop
+    entries for changes made in this process, changes made by other
+    processes are picked up when the TTL runs out.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def freeze(instance):
+        fields = [f.attname for f in instance._meta.concrete_fields]
+        return (
+            instance._state.db,
+            fields,
+            [getattr(instance, field) for field in fields],
+        )
+
+    @staticmethod
+    def thaw(model, frozen):
+        db, fields, values = frozen
+        return model.from_db(db, fields, values)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            _expires, _user_pk, user, token = entry
+        return self.thaw(User, user), self.thaw(Token, token)
+
+    def set(self, key, user, token):
+        entry = (
+            time.monotonic() + self.ttl,
+            user.pk,
+            self.freeze(user),
+            self.freeze(token),
+        )
+        with self.lock:
+            self._discard(key)
+            self.entries[key] = entry
+            self.keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._discard(next(iter(self.entries)))
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        user_pk = entry[1]
+        keys = self.keys_by_user.get(user_pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[user_pk]
+
+    def discard_key(self, key):
+        with self.lock:
+            self._discard(key)
+
+    def discard_user(self, user_pk):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_pk, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+
+
+def _build_cache():
+    options = getattr(settings, 'TOKEN_AUTH_CACHE', {})
+    return TokenCache(
+        max_entries=options.get('MAX_ENTRIES', 10000),
+        ttl=options.get('TTL', 60),
+    )
+
+
+token_cache = _build_cache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication without the authtoken_token -> redditors_user
+    join on every request: the answer for a token key is served from
+    token_cache until it expires, the token is deleted (logout) or the
+    user row changes.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance=None, **kwargs):
+    token_cache.discard_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_changed_user(sender, instance=None, **kwargs):
+    token_cache.discard_user(instance.pk)
@@ -8,12 +8,35 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from core.cache import is_shared
+from utilities.bulk import post_bulk_create, post_bulk_delete
+
 
 class MyUserManager(BaseUserManager):
+    def with_activity_counts(self):
+        """
+        Annotate loanrequests_count and savingrequests_count with
+        correlated COUNT subqueries, answered from the
+        (authorsender, created) indexes without loading any rows.
+        """
+        counts = {}
+        for related_name in ('loanrequests', 'savingrequests'):
+            related_model = self.model._meta.get_field(related_name).related_model
+            count = related_model.objects.filter(
+                authorsender=OuterRef('pk')
+            ).order_by().values('authorsender').annotate(c=Count('pk')).values('c')
+            counts['{}_count'.format(related_name)] = Coalesce(
+                Subquery(count, output_field=models.IntegerField()), 0
+            )
+        return self.get_queryset().annotate(**counts)
+
     def create_user(self, email, username, location, first_name, savingtarget, aadharcard, last_name, age,
                     password=None):
         if not email:
@@ -150,3 +173,94 @@ class UserSubMembership(models.Model):
 
     class Meta:
         unique_together = ('user', 'sub')
+
+    @staticmethod
+    def cache_key(user_pk, sub_pk):
+        return "sub-membership:{}:{}".format(user_pk, sub_pk)
+
+    @classmethod
+    def is_member(cls, user, sub):
+        """
+        Single EXISTS lookup on the (user, sub) unique index instead of
+        loading all of the user's subs. With a cache shared between
+        worker processes the answer is cached for
+        MEMBERSHIP_CACHE_TIMEOUT seconds, subscribing or unsubscribing
+        drops the entry through the signals below. A per process cache
+        would only drop it in the worker that handled the change, so
+        then every call asks the database.
+        """
+        if not is_shared(caches[DEFAULT_CACHE_ALIAS]):
+            return cls.objects.filter(user=user, sub=sub).exists()
+        key = cls.cache_key(user.pk, sub.pk)
+        member = cache.get(key)
+        if member is None:
+            member = cls.objects.filter(user=user, sub=sub).exists()
+            cache.set(
+                key,
+                member,
+                getattr(settings, 'MEMBERSHIP_CACHE_TIMEOUT', 60)
+            )
+        return member
+
+
+@receiver(post_save, sender=UserSubMembership)
+@receiver(post_delete, sender=UserSubMembership)
+def invalidate_membership_cache(sender, instance=None, **kwargs):
+    cache.delete(sender.cache_key(instance.user_id, instance.sub_id))
+
+
+@receiver(post_save, sender=UserSubMembership)
+def increment_memberscount(sender, instance=None, created=False, **kwargs):
+    if created:
+        Sub.objects.filter(pk=instance.sub_id).update(
+            memberscount=F('memberscount') + 1
+        )
+
+
+@receiver(post_delete, sender=UserSubMembership)
+def decrement_memberscount(sender, instance=None, **kwargs):
+    Sub.objects.filter(pk=instance.sub_id).update(
+        memberscount=F('memberscount') - 1
+    )
+
+
+@receiver(post_bulk_create, sender=UserSubMembership)
+@receiver(post_bulk_delete, sender=UserSubMembership)
+def sync_bulk_memberships(sender, instances=None, **kwargs):
+    """
+    Bulk subscribe/unsubscribe skips the per row signals above, drop
+    the cached answers and recount the subs in one go instead.
+    """
+    cache.delete_many([
+        sender.cache_key(instance.user_id, instance.sub_id)
+        for instance in instances
+    ])
+    Sub.objects.filter(
+        pk__in={instance.sub_id for instance in instances}
+    ).sync_counters(moderators=False)
+
+
+@receiver(m2m_changed, sender=Sub.moderators.through)
+def sync_moderatorscount(sender, instance=None, action=None, reverse=False,
+                         pk_set=None, **kwargs):
+    """
+    moderators.add/remove/clear from either side. Recount instead of
+    incrementing since remove() reports the pks it was given, not the
+    rows it actually deleted.
+    """
+    if reverse and action == 'pre_clear':
+        # instance is a user, remember which subs they are about to leave
+        instance._cleared_moderated_sub_pks = list(
+            instance.moderated_subs.values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        sub_pks = [instance.pk]
+    elif action == 'post_clear':
+        sub_pks = getattr(instance, '_cleared_moderated_sub_pks', [])
+    else:
+        sub_pks = pk_set or []
+    Sub.objects.filter(pk__in=sub_pks).sync_counters(members=False)
@@ -219,11 +219,99 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 
 # from comments.serializers import CommentSerializer
+from rest_framework.reverse import reverse
+
+from loanrequests.pagination import LoanrequestListPagination
 from loanrequests.serializers import LoanrequestSerializer
 
+from savingrequests.pagination import SavingrequestListPagination
 from savingrequests.serializers import SavingrequestSerializer
 
-class UserProfileSerializer(serializers.ModelSerializer):
+
+class ActivitySectionsMixin(serializers.Serializer):
+    """
+    The loanrequests and savingrequests of a user, newest first.
+    Only the first page is embedded, *_next links to the cursor mode
+    of the user's list view for the rest and *_count comes from the
+    with_activity_counts() annotation (or a COUNT when the user
+    wasn't loaded through it).
+    """
+    loanrequests = serializers.SerializerMethodField()
+    savingrequests = serializers.SerializerMethodField()
+    loanrequests_count = serializers.SerializerMethodField()
+    savingrequests_count = serializers.SerializerMethodField()
+    loanrequests_next = serializers.SerializerMethodField()
+    savingrequests_next = serializers.SerializerMethodField()
+
+    sections = {
+        'loanrequests': (
+            LoanrequestSerializer,
+            LoanrequestListPagination,
+            'user-loanrequest-list'
+        ),
+        'savingrequests': (
+            SavingrequestSerializer,
+            SavingrequestListPagination,
+            'user-savingrequest-list'
+        ),
+    }
+
+    def get_section(self, obj, name):
+        """
+        Fetch the first page of a section once, with one extra row to
+        know whether there is a next page.
+        """
+        if not hasattr(self, '_sections'):
+            self._sections = {}
+        cache = self._sections
+        key = (obj.pk, name)
+        if key not in cache:
+            serializer_class, pagination_class, url_name = self.sections[name]
+            paginator = pagination_class()
+            rows = list(
+                getattr(obj, name).with_related().order_by(
+                    *paginator.cursor_ordering
+                )[:paginator.page_size + 1]
+            )
+            next_link = None
+            if len(rows) > paginator.page_size:
+                rows = rows[:paginator.page_size]
+                url = reverse(
+                    url_name,
+                    kwargs={'username': obj.username},
+                    request=self.context.get('request')
+                )
+                next_link = paginator.get_cursor_link(url, rows[-1])
+            data = serializer_class(rows, many=True, context=self.context).data
+            cache[key] = (data, next_link)
+        return cache[key]
+
+    def get_section_count(self, obj, name):
+        count = getattr(obj, '{}_count'.format(name), None)
+        if count is None:
+            count = getattr(obj, name).count()
+        return count
+
+    def get_loanrequests(self, obj):
+        return self.get_section(obj, 'loanrequests')[0]
+
+    def get_savingrequests(self, obj):
+        return self.get_section(obj, 'savingrequests')[0]
+
+    def get_loanrequests_next(self, obj):
+        return self.get_section(obj, 'loanrequests')[1]
+
+    def get_savingrequests_next(self, obj):
+        return self.get_section(obj, 'savingrequests')[1]
+
+    def get_loanrequests_count(self, obj):
+        return self.get_section_count(obj, 'loanrequests')
+
+    def get_savingrequests_count(self, obj):
+        return self.get_section_count(obj, 'savingrequests')
+
+
+class UserProfileSerializer(ActivitySectionsMixin, serializers.ModelSerializer):
     """
     Provide the detail of a user, not for login but for profile pages.
     All information provied here will be publicly accessable.
@@ -253,8 +341,6 @@ class UserProfileSerializer(serializers.ModelSerializer):
         source='date_joined'
     )
     # comments = serializers.SerializerMethodField()
-    loanrequests = serializers.SerializerMethodField()
-    savingrequests = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -272,7 +358,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'moderated_subs',
             'location',
             'loanrequests',
+            'loanrequests_count',
+            'loanrequests_next',
             'savingrequests',
+            'savingrequests_count',
+            'savingrequests_next',
 
             'karma',
             'cake_day'
@@ -286,22 +376,6 @@ class UserProfileSerializer(serializers.ModelSerializer):
     #     )
     #     return serializer.data
 
-    def get_loanrequests(self, obj):
-        serializer = LoanrequestSerializer(
-            obj.loanrequests.all().order_by("-created"),
-            many=True,
-            context=self.context
-        )
-        return serializer.data
-
-    def get_savingrequests(self, obj):
-        serializer = SavingrequestSerializer(
-            obj.savingrequests.all().order_by("-created"),
-            many=True,
-            context=self.context
-        )
-        return serializer.data
-
     # def get_subs(self, obj):
     #     serializer = SubSerializer(
     #         obj.subs.all(),
@@ -310,7 +384,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     #     )
     #     return serializer.data
 
-class AccountPropertiesUpdateSerializer(serializers.ModelSerializer):
+class AccountPropertiesUpdateSerializer(ActivitySectionsMixin, serializers.ModelSerializer):
     subs = serializers.SlugRelatedField(
         many=True,
         read_only=True,
@@ -332,8 +406,6 @@ class AccountPropertiesUpdateSerializer(serializers.ModelSerializer):
     #     source='date_joined'
     # )
     # comments = serializers.SerializerMethodField()
-    loanrequests = serializers.SerializerMethodField()
-    savingrequests = serializers.SerializerMethodField()
     dummyAccountField = "ddddddddd"
     class Meta:
         model = User
@@ -351,7 +423,11 @@ class AccountPropertiesUpdateSerializer(serializers.ModelSerializer):
             'subs',
             'moderated_subs',
             'loanrequests',
+            'loanrequests_count',
+            'loanrequests_next',
             'savingrequests',
+            'savingrequests_count',
+            'savingrequests_next',
         )
 
     # def get_comments(self, obj):
@@ -362,28 +438,12 @@ class AccountPropertiesUpdateSerializer(serializers.ModelSerializer):
     #     )
     #     return serializer.data
 
-    def get_loanrequests(self, obj):
-        serializer = LoanrequestSerializer(
-            obj.loanrequests.all().order_by("-created"),
-            many=True,
-            context=self.context
-        )
-        return serializer.data
-
-    def get_savingrequests(self, obj):
-        serializer = SavingrequestSerializer(
-            obj.savingrequests.all().order_by("-created"),
-            many=True,
-            context=self.context
-        )
-        return serializer.data
-
     # class Meta:
     #     model = User
     #     fields = ['pk', 'email', 'username', ]
 
 
-class AccountPropertiesSerializer(serializers.ModelSerializer):
+class AccountPropertiesSerializer(ActivitySectionsMixin, serializers.ModelSerializer):
     subs = serializers.SlugRelatedField(
         many=True,
         read_only=True,
@@ -405,8 +465,6 @@ class AccountPropertiesSerializer(serializers.ModelSerializer):
         source='date_joined'
     )
     # comments = serializers.SerializerMethodField()
-    loanrequests = serializers.SerializerMethodField()
-    savingrequests = serializers.SerializerMethodField()
     dummyAccountField = "ddddddddd"
     class Meta:
         model = User
@@ -425,7 +483,11 @@ class AccountPropertiesSerializer(serializers.ModelSerializer):
             'moderated_subs',
             'dummyAccountField',
             'loanrequests',
+            'loanrequests_count',
+            'loanrequests_next',
             'savingrequests',
+            'savingrequests_count',
+            'savingrequests_next',
             'karma',
             'cake_day'
         )
@@ -438,22 +500,6 @@ class AccountPropertiesSerializer(serializers.ModelSerializer):
     #     )
     #     return serializer.data
 
-    def get_loanrequests(self, obj):
-        serializer = LoanrequestSerializer(
-            obj.loanrequests.all().order_by("-created"),
-            many=True,
-            context=self.context
-        )
-        return serializer.data
-
-    def get_savingrequests(self, obj):
-        serializer = SavingrequestSerializer(
-            obj.savingrequests.all().order_by("-created"),
-            many=True,
-            context=self.context
-        )
-        return serializer.data
-
     # class Meta:
     #     model = User
     #     fields = ['pk', 'email', 'username', ]
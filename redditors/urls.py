@@ -2,13 +2,18 @@ from django.urls import path, re_path
 from rest_framework.urlpatterns import format_suffix_patterns
 from rest_framework.authtoken.views import obtain_auth_token
 
-from redditors.views import account_properties_view, update_account_view
+from redditors.views import (
+    account_properties_view,
+    account_subs_view,
+    update_account_view
+)
 from . import views
 
 urlpatterns = [
     path('', views.UserListView.as_view(), name='user-list'),
     path('properties/', account_properties_view, name="user-properties"),
     path('properties/update', update_account_view, name="update"),
+    path('properties/subs/', account_subs_view, name="user-properties-subs"),
 
     path('login/', views.UserLoginView.as_view(), name='user-login'),
     path('logout/', views.UserLogoutView.as_view(), name='user-logout'),
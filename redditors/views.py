@@ -1,4 +1,5 @@
-from rest_framework import generics, serializers
+from django.utils.translation import gettext as _
+from rest_framework import generics
 from rest_framework import status, exceptions
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -12,8 +13,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from loanrequests.pagination import LoanrequestListPagination
-from log import setup_logger
+from log import sampled_logger
 from redditors.permissions import IsLoggedInOrReadOnly
+from search.filters import FullTextSearchFilter
 from subs.models import Sub
 from subs.serializers import SubSerializer
 from .models import User
@@ -24,16 +26,19 @@ from .serializers import (
     UserProfileSerializer,
     AccountPropertiesSerializer, AccountPropertiesUpdateSerializer)
 
-logger = setup_logger()
+# per-request lines, sampled down by LOG_SAMPLE_RATE
+logger = sampled_logger('requests')
 
 
 class UserListView(generics.ListAPIView):
     # queryset = User.objects.all()
-    queryset = User.objects.get_queryset().order_by('pk')
+    queryset = User.objects.prefetch_related(
+        'subs', 'moderated_subs'
+    ).order_by('pk')
     serializer_class = UserSerializer
     pagination_class = LoanrequestListPagination
     # pagination_class = PageNumberPagination
-    filter_backends = (SearchFilter, OrderingFilter)
+    filter_backends = (FullTextSearchFilter, OrderingFilter)
     search_fields = ('username',)
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
@@ -66,10 +71,38 @@ def account_properties_view(request):
 
     if request.method == 'GET':
         logger.info("Inside Get")
-        serializer = AccountPropertiesSerializer(user)
+        serializer = AccountPropertiesSerializer(
+            user,
+            context={'request': request}
+        )
         return Response(serializer.data)
 
 
+@api_view(['GET', ])
+@permission_classes((IsAuthenticated,))
+def account_subs_view(request):
+    """
+    The heavier half of the old login payload: the caller's subs and
+    moderated subs as full sub summaries.
+    """
+    user = request.user
+    context = {'request': request}
+    subs = SubSerializer(
+        user.subs.prefetch_related('moderators').with_caller_state(user),
+        many=True,
+        context=context
+    )
+    moderated_subs = SubSerializer(
+        user.moderated_subs.prefetch_related('moderators').with_caller_state(user),
+        many=True,
+        context=context
+    )
+    return Response({
+        'subs': subs.data,
+        'moderated_subs': moderated_subs.data
+    })
+
+
 @api_view(['PUT', ])
 @permission_classes((IsAuthenticated,))
 def update_account_view(request):
@@ -125,12 +158,14 @@ class SubUserListView(ListAPIView):
             ))
             raise exceptions.NotFound(message)
         # qs = user.subs.all()
-        qs = subreddit.members.get_queryset().order_by('pk')
+        qs = subreddit.members.prefetch_related(
+            'subs', 'moderated_subs'
+        ).order_by('pk')
         return qs
 
 
 class UserProfileDetailView(generics.RetrieveAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.with_activity_counts()
     permission_classes = (IsAuthenticatedOrReadOnly,)
     # lookup_field = 'username'
     lookup_field = 'username'
@@ -209,31 +244,26 @@ class UserLogoutView(APIView):
 
 
 class UserLoginView(ObtainAuthToken):
+    """
+    Hand out the auth token with the profile fields and a light list
+    of the user's subs (title and counts only). This is a fixed four
+    queries however many or however large the subs are: the user, the
+    token and one values() query per sub list.
+    The full sub representations are at account_subs_view.
+    """
+    sub_summary_fields = ('pk', 'title', 'memberscount', 'moderatorscount')
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(
             data=request.data,
             context={'request': request}
         )
-
-        loanrequests = serializers.SerializerMethodField()
-        savingrequests = serializers.SerializerMethodField()
-
-
-
-
-
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         token, _ = Token.objects.get_or_create(user=user)
-        subs = SubSerializer(user.subs.all(),
-                             many=True,
-                             context={'request': request}
-                             )
-        moderated_subs = SubSerializer(
-            user.moderated_subs.all(),
-            many=True,
-            context={'request': request}
+        subs = user.subs.order_by('title').values(*self.sub_summary_fields)
+        moderated_subs = user.moderated_subs.order_by('title').values(
+            *self.sub_summary_fields
         )
         return Response({
             'token': token.key,
@@ -247,6 +277,6 @@ class UserLoginView(ObtainAuthToken):
             'last_name': user.last_name,
             'age': user.age,
             'pk': user.pk,
-            'subs': subs.data,
-            'moderated_subs': moderated_subs.data
+            'subs': list(subs),
+            'moderated_subs': list(moderated_subs)
         })
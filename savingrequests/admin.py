@@ -2,7 +2,10 @@ from django.contrib import admin
 from import_export.admin import ImportExportModelAdmin
 
 from .models import Savingrequest
+from .resources import SavingrequestResource
 
 @admin.register(Savingrequest)
 class SavingrequestAdmin(ImportExportModelAdmin):
-    pass
+    resource_class = SavingrequestResource
+    # one LogEntry insert per row would undo the bulk writes
+    skip_admin_log = True
@@ -5,6 +5,9 @@ from django.utils import timezone
 
 from savingrequests.models import Savingrequest
 
+# betavariate(alpha, beta) * scale characters, at least minimum
+BODY_LENGTH = (1.2, 3, 2000, 10)
+
 
 class SavingrequestFactory(factory.django.DjangoModelFactory):
     class Meta:
@@ -20,13 +23,17 @@ class SavingrequestFactory(factory.django.DjangoModelFactory):
         loanrequests created in the current command.
         """
         fake = faker.Faker()
-        body_length = max(
-            round(random.betavariate(1.2, 3) * 2000),
-            10
-        )
-        kwargs['body'] = fake.text(body_length)
+        kwargs['body'] = fake.text(cls.get_body_length())
         return super()._create(model_class, *args, **kwargs)
 
+    @classmethod
+    def get_body_length(cls, rng=random):
+        alpha, beta, scale, minimum = BODY_LENGTH
+        return max(
+            round(rng.betavariate(alpha, beta) * scale),
+            minimum
+        )
+
     title = factory.Faker(
         'paragraph',
         nb_sentences=1,
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savingrequests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savingrequest',
+            index=models.Index(fields=['authorsender', 'created'], name='savingreq_author_created_idx'),
+        ),
+    ]
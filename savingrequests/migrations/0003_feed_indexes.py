@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savingrequests', '0002_author_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='savingrequest',
+            name='savingreq_author_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='savingrequest',
+            index=models.Index(fields=['subreddit', 'created', 'id'], name='savingreq_sub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savingrequest',
+            index=models.Index(fields=['authorsender', 'created', 'id'], name='savingreq_auth_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savingrequest',
+            index=models.Index(fields=['created', 'id'], name='savingreq_created_idx'),
+        ),
+    ]
@@ -2,10 +2,10 @@
 #
 #
 # # class PostListPagination(LimitOffsetPagination):
-from rest_framework.pagination import PageNumberPagination
+from utilities.pagination import FeedPagination
 
 
-class SavingrequestListPagination(PageNumberPagination):
+class SavingrequestListPagination(FeedPagination):
     # default_limit = 20
     # default_limit = 3
     # max_limit = 100
@@ -0,0 +1,27 @@
+from import_export import fields
+
+from core.importing import BulkModelResource, LookupForeignKeyWidget
+from redditors.models import User
+from subs.models import Sub
+from .models import Savingrequest
+
+
+class SavingrequestResource(BulkModelResource):
+    """
+    subreddit and authorsender are given as sub title and username.
+    """
+    subreddit = fields.Field(
+        attribute='subreddit',
+        column_name='subreddit',
+        widget=LookupForeignKeyWidget(Sub, 'title')
+    )
+    authorsender = fields.Field(
+        attribute='authorsender',
+        column_name='authorsender',
+        widget=LookupForeignKeyWidget(User, 'username')
+    )
+
+    class Meta(BulkModelResource.Meta):
+        model = Savingrequest
+        fields = ('id', 'created', 'title', 'savingamount', 'body',
+                  'subreddit', 'authorsender')
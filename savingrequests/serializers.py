@@ -2,7 +2,8 @@ from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.utils.translation import gettext as _
 from rest_framework import serializers
 
-from redditors.models import User
+from core.bulk import BulkRequestItemSerializer
+from redditors.models import User, UserSubMembership
 from subs.models import Sub
 # from votes.models import LoanrequestVote
 from .models import Savingrequest
@@ -57,7 +58,7 @@ class SavingrequestSerializer(serializers.ModelSerializer):
                      "'{}' subreddit.".format(subreddit.title))
                 )
                 raise serializers.ValidationError(message)
-            if not subreddit in authorsender.subs.all():
+            if not UserSubMembership.is_member(authorsender, subreddit):
                 message = _("You must be a member of the subreddit to Savingrequest here.")
                 raise serializers.ValidationError(message)
 
@@ -88,3 +89,11 @@ class SavingrequestSerializer(serializers.ModelSerializer):
     #         except LoanrequestVote.DoesNotExist:
     #             pass
     #     return 0
+
+
+class SavingrequestBulkItemSerializer(BulkRequestItemSerializer):
+    request_name = 'Savingrequest'
+
+    class Meta:
+        model = Savingrequest
+        fields = ('title', 'savingamount', 'body', 'subreddit', 'authorsender')
@@ -6,6 +6,8 @@ from . import views
 urlpatterns = [
     path('', views.SavingrequestListView.as_view(), name='savingrequest-list'),
     path('<int:pk>/', views.SavingrequestDetailView.as_view(), name='savingrequest-detail'),
+    path('bulk/', views.SavingrequestBulkCreateView.as_view(), name='savingrequest-bulk-create'),
+    path('export/', views.SavingrequestExportView.as_view(), name='savingrequest-export'),
     path(
         'subreddit-list/<slug:sub_title>/',
         views.SubSavingrequestListView.as_view(),
@@ -0,0 +1,23 @@
+from rest_framework.filters import SearchFilter
+
+from . import index
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Drop in replacement for SearchFilter that answers ?search= from
+    the full-text index instead of an icontains scan over
+    search_fields. Models without an index, or databases without
+    full-text support, still get the plain SearchFilter behaviour.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not index.is_indexed(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+        term = request.query_params.get(self.search_param, '')
+        if not index.get_tokens(term):
+            return queryset
+        filtered = index.filter_queryset(queryset, term)
+        if filtered is None:
+            return super().filter_queryset(request, queryset, view)
+        return filtered
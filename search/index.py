@@ -0,0 +1,249 @@
+"""
+Full-text index over the searchable models.
+
+There is one index table, search_document, shared by every indexed
+model. Its layout depends on the database:
+
+SQLite      an FTS5 virtual table (title, body) ranked with bm25().
+            The rowid packs the object pk and the model so that
+            updates and deletes are rowid lookups.
+PostgreSQL  a plain table holding a weighted tsvector per object
+            with a GIN index, ranked with ts_rank().
+
+Any other database has no index and callers fall back to the old
+icontains filters.
+"""
+import re
+
+from django.db import connection
+
+# model label -> (kind code, title field, body field)
+INDEXED_MODELS = {
+    'loanrequests.loanrequest': (1, 'title', 'body'),
+    'savingrequests.savingrequest': (2, 'title', 'body'),
+    'subs.sub': (3, 'title', 'description'),
+    'redditors.user': (4, 'username', None),
+}
+
+# rowid = pk * KIND_SLOTS + kind code (SQLite only)
+KIND_SLOTS = 8
+
+TABLE = 'search_document'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(conn=None):
+    conn = conn or connection
+    return conn.vendor in ('sqlite', 'postgresql')
+
+
+def is_indexed(model):
+    return model._meta.label_lower in INDEXED_MODELS
+
+
+def get_kind(model):
+    return INDEXED_MODELS[model._meta.label_lower][0]
+
+
+def get_fields(model):
+    return INDEXED_MODELS[model._meta.label_lower][1:]
+
+
+def create_table(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5("
+                "title, body, tokenize='porter unicode61', prefix='2 3')"
+                .format(TABLE)
+            )
+        elif conn.vendor == 'postgresql':
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS {} ("
+                "kind smallint NOT NULL, "
+                "object_id integer NOT NULL, "
+                "document tsvector NOT NULL, "
+                "PRIMARY KEY (kind, object_id))".format(TABLE)
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS {0}_gin ON {0} "
+                "USING GIN (document)".format(TABLE)
+            )
+
+
+def drop_table(conn=None):
+    conn = conn or connection
+    if is_supported(conn):
+        with conn.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS {}".format(TABLE))
+
+
+def index_rows(kind, rows, conn=None):
+    """
+    Add or replace documents, rows are (pk, title, body) tuples.
+    """
+    conn = conn or connection
+    rows = [(pk, title or '', body or '') for pk, title, body in rows]
+    if not rows or not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.executemany(
+                "INSERT OR REPLACE INTO {} (rowid, title, body) "
+                "VALUES (%s, %s, %s)".format(TABLE),
+                [(pk * KIND_SLOTS + kind, title, body)
+                 for pk, title, body in rows]
+            )
+        else:
+            cursor.executemany(
+                "INSERT INTO {} (kind, object_id, document) VALUES ("
+                "%s, %s, "
+                "setweight(to_tsvector('english', %s), 'A') || "
+                "setweight(to_tsvector('english', %s), 'B')) "
+                "ON CONFLICT (kind, object_id) "
+                "DO UPDATE SET document = EXCLUDED.document".format(TABLE),
+                [(kind, pk, title, body) for pk, title, body in rows]
+            )
+
+
+def remove_rows(kind, pks, conn=None):
+    conn = conn or connection
+    pks = list(pks)
+    if not pks or not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.executemany(
+                "DELETE FROM {} WHERE rowid = %s".format(TABLE),
+                [(pk * KIND_SLOTS + kind,) for pk in pks]
+            )
+        else:
+            cursor.execute(
+                "DELETE FROM {} WHERE kind = %s AND object_id = ANY(%s)"
+                .format(TABLE),
+                [kind, pks]
+            )
+
+
+def clear(kind, conn=None):
+    conn = conn or connection
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute(
+                "DELETE FROM {} WHERE rowid %% {} = %s".format(TABLE, KIND_SLOTS),
+                [kind]
+            )
+        else:
+            cursor.execute(
+                "DELETE FROM {} WHERE kind = %s".format(TABLE), [kind]
+            )
+
+
+def index_instance(instance):
+    title_field, body_field = get_fields(type(instance))
+    index_rows(get_kind(type(instance)), [(
+        instance.pk,
+        getattr(instance, title_field),
+        getattr(instance, body_field) if body_field else '',
+    )])
+
+
+def remove_instance(instance):
+    remove_rows(get_kind(type(instance)), [instance.pk])
+
+
+def index_queryset(queryset, batch_size=2000):
+    """
+    (Re)index every row of a queryset, reading it in chunks so this
+    works for the bulk import and rebuild paths too.
+    """
+    model = queryset.model
+    kind = get_kind(model)
+    title_field, body_field = get_fields(model)
+    columns = ['pk', title_field] + ([body_field] if body_field else [])
+    batch = []
+    count = 0
+    for row in queryset.values_list(*columns).iterator(chunk_size=batch_size):
+        batch.append(row if body_field else row + ('',))
+        if len(batch) >= batch_size:
+            index_rows(kind, batch)
+            count += len(batch)
+            batch = []
+    index_rows(kind, batch)
+    return count + len(batch)
+
+
+def get_tokens(term):
+    return TOKEN_RE.findall(term or '')[:16]
+
+
+def get_match_sql(model, term):
+    """
+    SQL returning the pks of matching objects together with a relevance
+    score where a higher score is better. Every search term has to match
+    (as a prefix, so partial words typed into a search box still hit).
+    Returns None if there is nothing to search for or no index.
+    """
+    tokens = get_tokens(term)
+    if not tokens or not is_supported():
+        return None
+    kind = get_kind(model)
+    if connection.vendor == 'sqlite':
+        query = " ".join('"{}"*'.format(token) for token in tokens)
+        sql = (
+            "SELECT rowid / {slots} AS object_id, "
+            "-bm25({table}, 10.0, 1.0) AS score "
+            "FROM {table} WHERE {table} MATCH %s "
+            "AND rowid %% {slots} = %s"
+        ).format(table=TABLE, slots=KIND_SLOTS)
+    else:
+        query = " & ".join("{}:*".format(token) for token in tokens)
+        sql = (
+            "SELECT object_id, ts_rank(document, query) AS score "
+            "FROM {table}, to_tsquery('english', %s) query "
+            "WHERE document @@ query AND kind = %s"
+        ).format(table=TABLE)
+    return sql, [query, kind]
+
+
+def filter_queryset(queryset, term):
+    """
+    Restrict a queryset to objects matching term. The match runs
+    inside the database as a subquery, nothing is loaded into python.
+    Returns None if the index can't answer.
+    """
+    match = get_match_sql(queryset.model, term)
+    if match is None:
+        return None
+    sql, params = match
+    # pk__in=RawSQL(...) would wrap the subquery in a second pair of
+    # parentheses, which makes it a scalar subquery
+    quote = connection.ops.quote_name
+    opts = queryset.model._meta
+    column = '{}.{}'.format(quote(opts.db_table), quote(opts.pk.column))
+    return queryset.extra(
+        where=["{} IN (SELECT object_id FROM ({}) matches)".format(column, sql)],
+        params=params
+    )
+
+
+def ranked_pks(model, term, limit=None, offset=0):
+    """
+    Pks of the objects matching term, most relevant first.
+    Returns None if the index can't answer.
+    """
+    match = get_match_sql(model, term)
+    if match is None:
+        return None
+    sql, params = match
+    sql = "SELECT object_id FROM ({}) matches ORDER BY score DESC, object_id DESC".format(sql)
+    if limit is not None:
+        sql += " LIMIT %s OFFSET %s"
+        params = params + [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,33 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search import index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text search index from scratch. Needed after "
+        "writes that skip model signals, e.g. bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help="Rows read and indexed per batch."
+        )
+
+    def handle(self, *args, **options):
+        if not index.is_supported():
+            self.stderr.write("This database has no full-text index support.")
+            return
+        index.create_table()
+        for label in index.INDEXED_MODELS:
+            model = apps.get_model(label)
+            with transaction.atomic():
+                index.clear(index.get_kind(model))
+                count = index.index_queryset(
+                    model.objects.all(),
+                    batch_size=options['batch_size']
+                )
+            self.stdout.write("Indexed {} {} rows".format(count, label))
@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# search.index when this migration was written, inlined so later
+# changes to search.index can't break it
+
+# model label -> (kind code, title field, body field)
+INDEXED_MODELS = {
+    'loanrequests.loanrequest': (1, 'title', 'body'),
+    'savingrequests.savingrequest': (2, 'title', 'body'),
+    'subs.sub': (3, 'title', 'description'),
+    'redditors.user': (4, 'username', None),
+}
+
+# rowid = pk * KIND_SLOTS + kind code (SQLite only)
+KIND_SLOTS = 8
+
+BATCH_SIZE = 2000
+
+
+def create_table(cursor, vendor):
+    if vendor == 'sqlite':
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_document USING fts5("
+            "title, body, tokenize='porter unicode61', prefix='2 3')"
+        )
+    else:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS search_document ("
+            "kind smallint NOT NULL, "
+            "object_id integer NOT NULL, "
+            "document tsvector NOT NULL, "
+            "PRIMARY KEY (kind, object_id))"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS search_document_gin ON search_document "
+            "USING GIN (document)"
+        )
+
+
+def index_rows(cursor, vendor, kind, rows):
+    if vendor == 'sqlite':
+        cursor.executemany(
+            "INSERT OR REPLACE INTO search_document (rowid, title, body) "
+            "VALUES (%s, %s, %s)",
+            [(pk * KIND_SLOTS + kind, title, body) for pk, title, body in rows]
+        )
+    else:
+        cursor.executemany(
+            "INSERT INTO search_document (kind, object_id, document) VALUES ("
+            "%s, %s, "
+            "setweight(to_tsvector('english', %s), 'A') || "
+            "setweight(to_tsvector('english', %s), 'B')) "
+            "ON CONFLICT (kind, object_id) "
+            "DO UPDATE SET document = EXCLUDED.document",
+            [(kind, pk, title, body) for pk, title, body in rows]
+        )
+
+
+def build_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ('sqlite', 'postgresql'):
+        return
+    with conn.cursor() as cursor:
+        create_table(cursor, conn.vendor)
+        for label, (kind, title_field, body_field) in INDEXED_MODELS.items():
+            model = apps.get_model(label)
+            columns = ['pk', title_field] + ([body_field] if body_field else [])
+            rows = model.objects.using(conn.alias).values_list(*columns)
+            batch = []
+            for row in rows.iterator(chunk_size=BATCH_SIZE):
+                pk, title, body = row if body_field else row + ('',)
+                batch.append((pk, title or '', body or ''))
+                if len(batch) >= BATCH_SIZE:
+                    index_rows(cursor, conn.vendor, kind, batch)
+                    batch = []
+            if batch:
+                index_rows(cursor, conn.vendor, kind, batch)
+
+
+def drop_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor in ('sqlite', 'postgresql'):
+        with conn.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS search_document")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanrequests', '0002_auto_20200802_1010'),
+        ('savingrequests', '0001_initial'),
+        ('subs', '0001_initial'),
+        ('redditors', '0003_user_is_verified_aadharcard'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_index, drop_index),
+    ]
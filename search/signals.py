@@ -0,0 +1,59 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from utilities.bulk import post_bulk_create, post_bulk_update
+from . import index
+
+
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the search index in step with every save. Saves that only
+    touch other columns (e.g. a user's last_login) are skipped.
+    """
+    if update_fields is not None:
+        indexed_fields = {f for f in index.get_fields(sender) if f}
+        if not indexed_fields.intersection(update_fields):
+            return
+    index.index_instance(instance)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    index.remove_instance(instance)
+
+
+def add_search_documents(sender, instances, fields=None, **kwargs):
+    if fields is not None:
+        indexed_fields = {f for f in index.get_fields(sender) if f}
+        if not indexed_fields.intersection(fields):
+            return
+    title_field, body_field = index.get_fields(sender)
+    index.index_rows(index.get_kind(sender), [(
+        instance.pk,
+        getattr(instance, title_field),
+        getattr(instance, body_field) if body_field else '',
+    ) for instance in instances])
+
+
+def connect_signals():
+    for label in index.INDEXED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(
+            update_search_document,
+            sender=model,
+            dispatch_uid='search-index-save-{}'.format(label)
+        )
+        post_delete.connect(
+            remove_search_document,
+            sender=model,
+            dispatch_uid='search-index-delete-{}'.format(label)
+        )
+        post_bulk_create.connect(
+            add_search_documents,
+            sender=model,
+            dispatch_uid='search-index-bulk-create-{}'.format(label)
+        )
+        post_bulk_update.connect(
+            add_search_documents,
+            sender=model,
+            dispatch_uid='search-index-bulk-update-{}'.format(label)
+        )
@@ -1,4 +1,12 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
 from loanrequests.models import Loanrequest
@@ -9,52 +17,182 @@ from savingrequests.models import Savingrequest
 from savingrequests.serializers import SavingrequestSerializer
 from subs.models import Sub
 from subs.serializers import SubSerializer
+from utilities.pagination import decode_cursor, encode_cursor
+from . import index
+
+# result type -> (base queryset, serializer, icontains fallback field)
+SEARCH_TYPES = OrderedDict((
+    ('loanrequests', (
+        lambda request: Loanrequest.objects.with_related(),
+        LoanrequestSerializer,
+        'title'
+    )),
+    ('savingrequests', (
+        lambda request: Savingrequest.objects.with_related(),
+        SavingrequestSerializer,
+        'title'
+    )),
+    ('users', (
+        lambda request: User.objects.prefetch_related(
+            'subs', 'moderated_subs'
+        ),
+        UserSerializer,
+        'username'
+    )),
+    ('subreddits', (
+        lambda request: Sub.objects.prefetch_related(
+            'moderators'
+        ).with_caller_state(request.user),
+        SubSerializer,
+        'title'
+    )),
+))
+
+_executor = None
+
+
+def get_executor():
+    """
+    One pool for the process. Its threads keep their own database
+    connections between requests, like request threads do.
+    """
+    global _executor
+    workers = getattr(settings, 'SEARCH_CONCURRENCY', len(SEARCH_TYPES))
+    if workers <= 1:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='search'
+        )
+    return _executor
+
+
+def search_queryset(queryset, search_term, fallback_field, limit, offset=0):
+    """
+    Look the term up in the full-text index and return up to limit
+    matching objects, most relevant first, starting at offset.
+    Without an index fall back to the old icontains filter on a
+    single field.
+    """
+    pks = index.ranked_pks(queryset.model, search_term, limit, offset)
+    if pks is None:
+        return list(queryset.filter(
+            **{'{}__icontains'.format(fallback_field): search_term}
+        ).order_by('pk')[offset:offset + limit])
+    objects = queryset.in_bulk(pks)
+    return [objects[pk] for pk in pks if pk in objects]
 
 
 class SearchView(APIView):
     """
     Very simple search view, takes a single GET query param and
-    searches database for post, sureddit and users that contain
-    that text. It then returns a serialized list of for each.
+    searches the full-text index for posts, subreddits and users
+    matching that text. It then returns a serialized list of for each,
+    ordered by relevance.
     In the case of Posts the pks are returned, for Subreddits and users
     the title and username are returned.
+
+    Each list holds at most `limit` results. `next` has a link per type
+    that pages through that type alone, the four lookups themselves run
+    concurrently.
+
+    query parameters: q, limit, type, cursor
     """
     http_method_names=['get']
-    
+    default_limit = 10
+    max_limit = 50
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.GET.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_types(self, request):
+        requested = request.GET.get('type')
+        if not requested:
+            return list(SEARCH_TYPES)
+        types = [t for t in requested.split(',') if t]
+        unknown = [t for t in types if t not in SEARCH_TYPES]
+        if unknown:
+            message = _("Unknown search type '{}'".format(unknown[0]))
+            raise ValidationError({'type': message})
+        return types
+
+    def get_offset(self, request):
+        token = request.GET.get('cursor')
+        if not token:
+            return 0
+        position, _reverse = decode_cursor(token)
+        if len(position) != 1 or not isinstance(position[0], int) \
+                or position[0] < 0:
+            raise NotFound(_("Invalid cursor"))
+        return position[0]
+
+    def run_lookup(self, search_type, search_term, limit, offset, context):
+        get_queryset, serializer_class, fallback_field = SEARCH_TYPES[search_type]
+        # one extra row tells us whether there is a next page
+        results = search_queryset(
+            get_queryset(context['request']),
+            search_term,
+            fallback_field,
+            limit + 1,
+            offset
+        )
+        has_next = len(results) > limit
+        data = serializer_class(
+            results[:limit], many=True, context=context
+        ).data
+        return data, has_next
+
+    def run_lookup_in_thread(self, *args):
+        close_old_connections()
+        try:
+            return self.run_lookup(*args)
+        finally:
+            close_old_connections()
+
+    def get_next_link(self, request, search_type, offset):
+        url = request.build_absolute_uri()
+        url = replace_query_param(url, 'type', search_type)
+        return replace_query_param(url, 'cursor', encode_cursor([offset]))
+
     def get(self, request, format=None, **kwargs):
 
         search_term = request.GET.get('q', '')
-    
+        limit = self.get_limit(request)
+        types = self.get_types(request)
+        offset = self.get_offset(request)
+
         serializer_context = {
             'request': request
         }
-            
-        loanrequests = LoanrequestSerializer(
-            Loanrequest.objects.filter(title__icontains=search_term),
-            many=True,
-            context=serializer_context
-        )
-        savingrequests = SavingrequestSerializer(
-            Savingrequest.objects.filter(title__icontains=search_term),
-            many=True,
-            context=serializer_context
-        )
-        users = UserSerializer(
-            User.objects.filter(username__icontains=search_term),
-            many=True,
-            context=serializer_context
-        )
-        subreddits = SubSerializer(
-            Sub.objects.filter(title__icontains=search_term),
-            many=True,
-            context=serializer_context
-        )
 
-        data = {
-            'loanrequests': loanrequests.data,
-            'savingrequests': savingrequests.data,
-            'users': users.data,
-            'subreddits': subreddits.data,
-        }
-        
+        lookups = [
+            (search_type, search_term, limit, offset, serializer_context)
+            for search_type in types
+        ]
+        executor = get_executor()
+        # other threads can't see rows of an open transaction (e.g. tests)
+        if executor is None or len(lookups) == 1 or connection.in_atomic_block:
+            results = [self.run_lookup(*lookup) for lookup in lookups]
+        else:
+            futures = [
+                executor.submit(self.run_lookup_in_thread, *lookup)
+                for lookup in lookups
+            ]
+            results = [future.result() for future in futures]
+
+        data = OrderedDict()
+        next_links = OrderedDict()
+        for search_type, (results_data, has_next) in zip(types, results):
+            data[search_type] = results_data
+            next_links[search_type] = (
+                self.get_next_link(request, search_type, offset + limit)
+                if has_next else None
+            )
+        data['next'] = next_links
+
         return Response(data=data)
@@ -3,6 +3,7 @@ from import_export.admin import ImportExportModelAdmin
 
 from log import setup_logger
 from subs.models import Sub
+from subs.resources import SubResource
 
 logger = setup_logger()
 
@@ -11,4 +12,6 @@ logger.info(hell)
 
 @admin.register(Sub)
 class SubAdmin(ImportExportModelAdmin):
-    pass
+    resource_class = SubResource
+    # one LogEntry insert per row would undo the bulk writes
+    skip_admin_log = True
@@ -5,6 +5,9 @@ import faker
 from subs.models import Sub
 from redditors.models import User, UserSubMembership
 
+# betavariate(alpha, beta) * scale sentences, at least minimum
+DESCRIPTION_SENTENCES = (1.1, 3, 10, 1)
+
 class SubredditFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Sub
@@ -15,10 +18,11 @@ class SubredditFactory(factory.django.DjangoModelFactory):
             x for x in slug.replace("-", " ").title() if not x.isspace()
         ])
     @classmethod
-    def get_description(cls, fake):
+    def get_description(cls, fake, rng=random):
+        alpha, beta, scale, minimum = DESCRIPTION_SENTENCES
         desc_length = max(
-            round(random.betavariate(1.1, 3)*10),
-            1
+            round(rng.betavariate(alpha, beta)*scale),
+            minimum
         )
         description = fake.sentences(desc_length)
         return " ".join(description)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from subs.models import Sub
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount Sub.memberscount and Sub.moderatorscount from the "
+        "membership and moderator tables, e.g. after bulk imports or "
+        "manual database edits let them drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'titles', nargs='*',
+            help="Only resync these subs, all subs by default."
+        )
+
+    def handle(self, *args, **options):
+        subs = Sub.objects.all()
+        if options['titles']:
+            subs = subs.filter(title__in=options['titles'])
+        updated = subs.sync_counters()
+        self.stdout.write("Synced the counters of {} subs".format(updated))
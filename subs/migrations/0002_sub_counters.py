@@ -0,0 +1,43 @@
+# Generated by Django 2.2.28 on 2026-10-18 13:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing(apps, schema_editor):
+    Sub = apps.get_model('subs', 'Sub')
+    UserSubMembership = apps.get_model('redditors', 'UserSubMembership')
+
+    def count_of(through):
+        counts = through.objects.filter(
+            sub=OuterRef('pk')
+        ).order_by().values('sub').annotate(c=Count('pk')).values('c')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Sub.objects.update(
+        memberscount=count_of(UserSubMembership),
+        moderatorscount=count_of(Sub.moderators.through),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subs', '0001_initial'),
+        ('redditors', '0003_user_is_verified_aadharcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sub',
+            name='memberscount',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='sub',
+            name='moderatorscount',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subs', '0002_sub_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sub',
+            name='memberscount',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='sub',
+            name='moderatorscount',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,5 +1,43 @@
 from django.db import models
 from django.core.exceptions import FieldError
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class SubQuerySet(models.QuerySet):
+    def sync_counters(self, members=True, moderators=True):
+        """
+        Recount the stored counters of these subs in one UPDATE,
+        used by the sync_sub_counters command and whenever a counter
+        can't be moved by a simple increment.
+        """
+        def count_of(through):
+            counts = through.objects.filter(
+                sub=OuterRef('pk')
+            ).order_by().values('sub').annotate(c=Count('pk')).values('c')
+            return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+        counters = {}
+        if members:
+            counters['memberscount'] = count_of(self.model.members.through)
+        if moderators:
+            counters['moderatorscount'] = count_of(self.model.moderators.through)
+        return self.update(**counters)
+
+    def with_caller_state(self, user):
+        """
+        Annotate whether `user` is a member of each sub, so a whole
+        page of subs gets the caller's membership state in the same
+        query instead of one lookup per sub.
+        """
+        if not (user and user.is_authenticated):
+            return self
+        return self.annotate(caller_is_member=Exists(
+            self.model.members.through.objects.filter(
+                sub=OuterRef('pk'),
+                user=user
+            )
+        ))
 
 
 class Sub(models.Model):
@@ -16,15 +54,13 @@ class Sub(models.Model):
     title = models.SlugField(max_length=40, unique=True)
     description = models.CharField(max_length=1000, blank=True)
 
-    @property
-    def memberscount(self):
-
-        return len(self.members.all())
+    # Denormalized counters, kept up to date by the UserSubMembership
+    # and moderators signals in redditors.models. Only those write
+    # them, see save()
+    memberscount = models.IntegerField(default=0, db_index=True, editable=False)
+    moderatorscount = models.IntegerField(default=0, editable=False)
 
-    @property
-    def moderatorscount(self):
-
-        return len(self.moderators.all())
+    counter_fields = ('memberscount', 'moderatorscount')
 
     moderators = models.ManyToManyField(
         to='redditors.User',
@@ -33,16 +69,26 @@ class Sub(models.Model):
     # ManyToManyField to User, related_name="members"
     # backward FK loanrequests from Post
 
+    objects = SubQuerySet.as_manager()
+
     def __str__(self):
         return "subReddit: {}".format(self.title)
 
     def save(self, *args, **kwargs):
         """
         Prevent creation of subreddits that use names
-        needed for the psuedo subreddits
+        needed for the psuedo subreddits.
+        Updating an existing sub leaves the counters alone, the
+        instance may have loaded them before a join or leave moved
+        them with an F() update.
         """
         if self.title.lower() in self.pseudo_subreddits:
             message = "The subreddit title '{}' is reserved".format(self.title)
             raise FieldError(message)
-        else:
-            super().save(*args, **kwargs)
+        if (not self._state.adding and not kwargs.get('force_insert') and
+                kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,14 @@
+from core.importing import BulkModelResource, ReservedTitleMixin
+from .models import Sub
+
+
+class SubResource(ReservedTitleMixin, BulkModelResource):
+    """
+    Rows are matched to existing subs by title. Members and moderators
+    aren't part of the import, so the stored counters don't move.
+    """
+
+    class Meta(BulkModelResource.Meta):
+        model = Sub
+        fields = ('title', 'created', 'description')
+        import_id_fields = ('title',)
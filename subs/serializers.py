@@ -7,24 +7,63 @@ from redditors.models import User, UserSubMembership
 
 
 class SubSerializer(serializers.ModelSerializer):
-    moderators = serializers.SlugRelatedField(
-        many=True,
-        read_only=True,
-        slug_field='username'
-
-    )
-
-    members = serializers.SlugRelatedField(
-        many=True,
-        read_only=True,
-        slug_field='username'
-
-    )
+    """
+    Compact representation of a sub used by the list endpoints,
+    search, login and subscriptions. Instead of every member and
+    moderator username it carries the counts, the first few
+    moderators and the caller's own membership state. The full member
+    list is only available paginated through SubUserListView.
+    """
+    moderators_preview_size = 3
+
+    moderators = serializers.SerializerMethodField()
+    is_member = serializers.SerializerMethodField()
+    is_moderator = serializers.SerializerMethodField()
 
     class Meta:
         model = Sub
         fields = ('pk', 'created', 'title', 'description',
-                  'moderators', 'members', 'memberscount', 'moderatorscount')
+                  'memberscount', 'moderatorscount', 'moderators',
+                  'is_member', 'is_moderator')
+        read_only_fields = ('memberscount', 'moderatorscount')
+
+    def get_caller(self):
+        request = self.context.get("request")
+        if request and request.user and request.user.is_authenticated:
+            return request.user
+        return None
+
+    def moderators_prefetched(self, obj):
+        return 'moderators' in getattr(obj, '_prefetched_objects_cache', {})
+
+    def get_moderators(self, obj):
+        """
+        A few moderator usernames, from the prefetch cache when the
+        view prefetched them, otherwise with a LIMIT query.
+        """
+        moderators = obj.moderators.all()
+        if not self.moderators_prefetched(obj):
+            moderators = moderators.order_by('pk')[:self.moderators_preview_size]
+        return [
+            moderator.username
+            for moderator in list(moderators)[:self.moderators_preview_size]
+        ]
+
+    def get_is_member(self, obj):
+        user = self.get_caller()
+        if user is None:
+            return False
+        if hasattr(obj, 'caller_is_member'):
+            return obj.caller_is_member
+        return UserSubMembership.is_member(user, obj)
+
+    def get_is_moderator(self, obj):
+        user = self.get_caller()
+        if user is None:
+            return False
+        if self.moderators_prefetched(obj):
+            return any(m.pk == user.pk for m in obj.moderators.all())
+        return obj.moderators.filter(pk=user.pk).exists()
 
     def validate_title(self, value):
         """
@@ -36,6 +75,19 @@ class SubSerializer(serializers.ModelSerializer):
         return value
 
 
+class SubDetailSerializer(SubSerializer):
+    """
+    A single sub also lists all of its moderators, still without the
+    members.
+    """
+    moderators = serializers.SlugRelatedField(
+        many=True,
+        read_only=True,
+        slug_field='username'
+
+    )
+
+
 class SubredditSubscribeSerializer(serializers.ModelSerializer):
     action = serializers.CharField(write_only=True)
     sub = SubSerializer(read_only=True)
@@ -72,6 +124,8 @@ class SubredditSubscribeSerializer(serializers.ModelSerializer):
             )
             raise serializers.ValidationError(message)
 
+        # the cached UserSubMembership.is_member answer for this
+        # user and sub is dropped by the membership save/delete signals
         # try to subscribe
         if action == "sub":
             try:
@@ -79,6 +133,8 @@ class SubredditSubscribeSerializer(serializers.ModelSerializer):
                     user=user,
                     sub=sub
                 )
+                # pick up the counter bumped by the membership signal
+                sub.refresh_from_db(fields=['memberscount'])
                 return membership
             except IntegrityError:
                 message = _(
@@ -104,3 +160,17 @@ class SubredditSubscribeSerializer(serializers.ModelSerializer):
         # ugly fix to get around the neccessity of returning an instance
         # without rewriting .save()
         return True
+
+
+class SubscriptionItemSerializer(serializers.Serializer):
+    """
+    One entry of a bulk subscribe, a sub title and 'sub' or 'unsub'.
+    """
+    title = serializers.CharField()
+    action = serializers.CharField()
+
+    def validate_action(self, value):
+        if value.lower() not in ["unsub", "sub"]:
+            message = _("Action must be either 'sub' or 'unsub'.")
+            raise serializers.ValidationError(message)
+        return value.lower()
@@ -11,6 +11,9 @@ urlpatterns = [
         views.UserSubListView.as_view(),
         name='user-sub-list'
     ),
+    path('subscribe/',
+         views.SubredditBulkSubscribeView.as_view(),
+         name='subreddit-bulk-subscribe'),
     path('sub/<slug:title>/subscribe/',
          views.SubredditSubscribeView.as_view(),
          name='subreddit-subscribe')
@@ -1,16 +1,27 @@
+from django.conf import settings
+from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import generics
 from rest_framework import status, exceptions
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import (IsAuthenticatedOrReadOnly)
+from rest_framework.permissions import (IsAuthenticated, IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
+from core.cache import CachedResponseMixin
+from core.signals import sub_tag
 from loanrequests.pagination import LoanrequestListPagination
 from redditors.models import UserSubMembership, User
+from search.filters import FullTextSearchFilter
+from utilities.bulk import bulk_create_ignore_conflicts, bulk_delete
 from .models import Sub
 from .permissions import IsModeratorOrAdminOrReadOnly
-from .serializers import SubSerializer, SubredditSubscribeSerializer
+from .serializers import (
+    SubSerializer,
+    SubDetailSerializer,
+    SubredditSubscribeSerializer,
+    SubscriptionItemSerializer
+)
 
 
 class UserSubListView(ListAPIView):
@@ -20,8 +31,9 @@ class UserSubListView(ListAPIView):
     serializer_class = SubSerializer
     pagination_class = LoanrequestListPagination
     # pagination_class = PageNumberPagination
-    filter_backends = (SearchFilter, OrderingFilter)
+    filter_backends = (FullTextSearchFilter, OrderingFilter)
     search_fields = ('title', 'description')
+    ordering_fields = ('created', 'title', 'memberscount')
 
     def get_queryset(self):
 
@@ -42,20 +54,29 @@ class UserSubListView(ListAPIView):
             ))
             raise exceptions.NotFound(message)
         # qs = user.subs.all()
-        qs = user.subs.get_queryset().order_by('pk')
+        qs = user.subs.prefetch_related(
+            'moderators'
+        ).with_caller_state(self.request.user).order_by('pk')
         return qs
 
 
-class SubListView(generics.ListCreateAPIView):
+class SubListView(CachedResponseMixin, generics.ListCreateAPIView):
     # queryset = Sub.objects.all()
-    queryset = Sub.objects.get_queryset().order_by('pk')
+    queryset = Sub.objects.prefetch_related(
+        'moderators'
+    ).order_by('pk')
     serializer_class = SubSerializer
     pagination_class = LoanrequestListPagination
     # pagination_class = PageNumberPagination
-    filter_backends = (SearchFilter, OrderingFilter)
+    filter_backends = (FullTextSearchFilter, OrderingFilter)
     search_fields = ('title', 'description')
+    ordering_fields = ('created', 'title', 'memberscount')
 
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    cache_tags = ('subs',)
+
+    def get_queryset(self):
+        return super().get_queryset().with_caller_state(self.request.user)
 
     def perform_create(self, serializer):
         """
@@ -66,14 +87,18 @@ class SubListView(generics.ListCreateAPIView):
         new_sub = serializer.save()
         new_sub.moderators.add(user)
         UserSubMembership.objects.create(user=user, sub=new_sub)
+        new_sub.refresh_from_db(fields=['memberscount', 'moderatorscount'])
 
 
-class SubDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Sub.objects.all()
-    serializer_class = SubSerializer
+class SubDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Sub.objects.prefetch_related('moderators')
+    serializer_class = SubDetailSerializer
     lookup_field = 'title'
     permission_classes = (IsModeratorOrAdminOrReadOnly,)
 
+    def get_cache_tags(self):
+        return [sub_tag(self.kwargs['title'])]
+
     def get(self, request, *args, **kwargs):
         """
         Need to filter out requests to the pseudo-subreddits like
@@ -118,3 +143,116 @@ class SubredditSubscribeView(generics.CreateAPIView):
         if serializer.validated_data["action"] == "unsub":
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SubredditBulkSubscribeView(generics.GenericAPIView):
+    """
+    Subscribe to or unsubscribe from many subreddits at once, e.g.
+        [{"title": "money", "action": "sub"},
+         {"title": "other", "action": "unsub"}]
+
+    The entries are applied in order, so the last one for a sub wins.
+    Subscribing twice or leaving a sub you are not in is not an error,
+    the entry just comes back as "unchanged". All inserts and deletes
+    happen in one transaction and the member counters of the touched
+    subs are recounted once at the end.
+    Each entry gets a result with its status ("subscribed",
+    "unsubscribed", "unchanged" or "error") and the sub's member count.
+    """
+    serializer_class = SubscriptionItemSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_max_items(self):
+        return getattr(settings, 'BULK_SUBSCRIBE_MAX_ITEMS', 500)
+
+    def get_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise exceptions.ValidationError(_("Expected a list of subscriptions."))
+        if not items:
+            raise exceptions.ValidationError(_("The list of subscriptions is empty."))
+        if len(items) > self.get_max_items():
+            raise exceptions.ValidationError(
+                _("At most {} subscriptions per request.".format(
+                    self.get_max_items()
+                ))
+            )
+        return items
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        user = request.user
+        serializer = self.get_serializer()
+
+        results = []
+        entries = []
+        for index, item in enumerate(items):
+            try:
+                entries.append((index, serializer.run_validation(item)))
+            except exceptions.ValidationError as exc:
+                results.append({
+                    'index': index,
+                    'status': 'error',
+                    'errors': exc.detail,
+                })
+
+        subs = {
+            sub.title: sub
+            for sub in Sub.objects.filter(
+                title__in={entry['title'] for _index, entry in entries}
+            )
+        }
+
+        with transaction.atomic():
+            existing = set(UserSubMembership.objects.filter(
+                user=user, sub__in=subs.values()
+            ).values_list('sub_id', flat=True))
+
+            # replay the entries against the current memberships
+            subscribed = set(existing)
+            for index, entry in entries:
+                sub = subs.get(entry['title'])
+                if sub is None:
+                    message = _(
+                        "The subreddit '{}' does not exist.".format(entry['title'])
+                    )
+                    results.append({
+                        'index': index,
+                        'status': 'error',
+                        'errors': {'title': [message]},
+                    })
+                    continue
+                result = {'index': index, 'title': sub.title, 'status': 'unchanged'}
+                if entry['action'] == 'sub' and sub.pk not in subscribed:
+                    subscribed.add(sub.pk)
+                    result['status'] = 'subscribed'
+                elif entry['action'] == 'unsub' and sub.pk in subscribed:
+                    subscribed.discard(sub.pk)
+                    result['status'] = 'unsubscribed'
+                results.append(result)
+
+            by_pk = {sub.pk: sub for sub in subs.values()}
+            bulk_create_ignore_conflicts(UserSubMembership, [
+                UserSubMembership(user=user, sub=by_pk[sub_pk])
+                for sub_pk in subscribed - existing
+            ])
+            bulk_delete(UserSubMembership.objects.filter(
+                user=user, sub__in=existing - subscribed
+            ).select_related('sub'))
+
+        memberscounts = dict(Sub.objects.filter(
+            pk__in=by_pk
+        ).values_list('title', 'memberscount'))
+        for result in results:
+            if 'title' in result:
+                result['memberscount'] = memberscounts.get(result['title'])
+        results.sort(key=lambda result: result['index'])
+
+        failed = sum(1 for result in results if result['status'] == 'error')
+        if not failed:
+            response_status = status.HTTP_200_OK
+        elif failed < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=response_status)
@@ -0,0 +1,118 @@
+from django.db import connections, router, transaction
+from django.dispatch import Signal
+
+# Sent after bulk_create_with_pks inserted rows, bulk_create itself
+# doesn't send post_save so receivers that keep things like the search
+# index or caches in step with saves need to listen to this one too.
+post_bulk_create = Signal(providing_args=['instances', 'using'])
+# Same for bulk_delete, which skips the per row post_delete.
+post_bulk_delete = Signal(providing_args=['instances', 'using'])
+# And for bulk_update_with_signal, bulk_update doesn't send post_save.
+post_bulk_update = Signal(providing_args=['instances', 'fields', 'using'])
+
+
+def can_return_pks(connection):
+    features = connection.features
+    return (
+        getattr(features, 'can_return_rows_from_bulk_insert', False) or
+        getattr(features, 'can_return_ids_from_bulk_insert', False)
+    )
+
+
+def bulk_create_with_pks(model, objs, batch_size=500):
+    """
+    bulk_create the objects and make sure every one of them has its pk
+    set afterwards, then send post_bulk_create.
+
+    PostgreSQL hands the new pks back from the INSERT. SQLite doesn't,
+    there the insert runs in a transaction and we read back the highest
+    len(objs) pks: SQLite has a single writer and keeps its write lock
+    until the transaction ends, so those are the rows we just inserted.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    using = router.db_for_write(model)
+    connection = connections[using]
+    # Django 2.2 lets an explicit batch_size overrule the backend's
+    # limit (SQLite allows 999 parameters and 500 compound SELECTs)
+    batch_size = min(batch_size, max(connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, objs
+    ), 1))
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+        if not can_return_pks(connection):
+            pks = list(
+                model.objects.using(using).order_by('-pk')
+                .values_list('pk', flat=True)[:len(objs)]
+            )
+            for obj, pk in zip(objs, reversed(pks)):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = using
+        post_bulk_create.send(sender=model, instances=objs, using=using)
+    return objs
+
+
+def bulk_update_with_signal(model, objs, fields, batch_size=500):
+    """
+    bulk_update the given fields of the objects, then send
+    post_bulk_update.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_update(objs, fields, batch_size=batch_size)
+        post_bulk_update.send(
+            sender=model, instances=objs, fields=fields, using=using
+        )
+    return objs
+
+
+def bulk_create_ignore_conflicts(model, objs, batch_size=500):
+    """
+    Insert the objects in bulk, silently skipping any that would break
+    a unique constraint, then send post_bulk_create with all of them.
+    Nothing can tell which ones were skipped so pks are not set,
+    receivers have to work from the other columns.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(
+            objs, batch_size=batch_size, ignore_conflicts=True
+        )
+        post_bulk_create.send(sender=model, instances=objs, using=using)
+    return objs
+
+
+def bulk_delete(queryset, batch_size=500):
+    """
+    Delete the rows of a queryset with plain DELETE ... WHERE id IN
+    statements instead of going through the collector, which sends
+    post_delete for every row, then send post_bulk_delete with the
+    deleted instances. Only for models that nothing cascades from.
+    """
+    using = queryset.db
+    model = queryset.model
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    sql = "DELETE FROM {} WHERE {} IN ({{}})".format(
+        quote(model._meta.db_table), quote(model._meta.pk.column)
+    )
+    with transaction.atomic(using=using):
+        instances = list(queryset)
+        if instances:
+            pks = [instance.pk for instance in instances]
+            with connection.cursor() as cursor:
+                for start in range(0, len(pks), batch_size):
+                    batch = pks[start:start + batch_size]
+                    cursor.execute(
+                        sql.format(', '.join(['%s'] * len(batch))), batch
+                    )
+            post_bulk_delete.send(sender=model, instances=instances, using=using)
+    return instances
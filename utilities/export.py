@@ -0,0 +1,54 @@
+"""
+Generators for streaming exports. Rows come from
+QuerySet.iterator(), which reads through a server side cursor on
+PostgreSQL and in chunk_size batches elsewhere, and each line is
+yielded as soon as it is encoded so memory use doesn't grow with
+the size of the table.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+
+CONTENT_TYPES = {
+    CSV: 'text/csv',
+    NDJSON: 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_values(queryset, columns, chunk_size=2000):
+    for row in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        yield [encode_value(value) for value in row]
+
+
+def iter_csv(queryset, columns, headers=None, chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers or columns)
+    for row in iter_values(queryset, columns, chunk_size):
+        yield writer.writerow(row)
+
+
+def iter_ndjson(queryset, columns, headers=None, chunk_size=2000):
+    keys = headers or columns
+    for row in iter_values(queryset, columns, chunk_size):
+        yield json.dumps(dict(zip(keys, row))) + '\n'
+
+
+def iter_export(output, queryset, columns, headers=None, chunk_size=2000):
+    generator = iter_csv if output == CSV else iter_ndjson
+    return generator(queryset, columns, headers, chunk_size)
@@ -0,0 +1,44 @@
+from rest_framework.filters import OrderingFilter
+
+from utilities.reddit_orderby import ordering as ordering_aliases
+
+
+class IndexedOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that only sorts on what the feed indexes cover.
+
+    Plain OrderingFilter lets ?ordering= name any serializer field, so
+    a client can make the database sort a whole table on e.g. body.
+    Here only `ordering_fields` (the view's, else created and pk) are
+    accepted, only the first one is used, and created gets pk in the
+    same direction as a tie breaker so ('-created', '-pk') walks the
+    (…, created, id) indexes backwards. The aliases of
+    utilities.reddit_orderby ('new') work too, also through the older
+    ?orderby= parameter. Anything else keeps the view's own ordering.
+    """
+    ordering_fields = ('created', 'pk')
+    orderby_param = 'orderby'
+
+    def get_valid_fields(self, queryset, view, context={}):
+        fields = getattr(view, 'ordering_fields', None) or self.ordering_fields
+        return [(field, field) for field in fields]
+
+    def get_ordering(self, request, queryset, view):
+        params = (
+            request.query_params.get(self.ordering_param) or
+            request.query_params.get(self.orderby_param)
+        )
+        if params:
+            fields = [
+                ordering_aliases.get(param.strip(), param.strip())
+                for param in params.split(',')
+            ]
+            ordering = self.remove_invalid_fields(queryset, fields, view, request)
+            if ordering:
+                return self.add_tie_breaker(ordering[0])
+        return self.get_default_ordering(view)
+
+    def add_tie_breaker(self, field):
+        if field.lstrip('-') == 'created':
+            return [field, '-pk' if field.startswith('-') else 'pk']
+        return [field]
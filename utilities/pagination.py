@@ -0,0 +1,227 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(position, reverse=False):
+    """
+    Turn a keyset position (a list of ordering values) into an
+    opaque, url safe token. Datetimes keep their microseconds so
+    that rows created within the same millisecond stay distinct.
+    """
+    payload = {
+        'p': [v.isoformat() if isinstance(v, datetime) else v
+              for v in position],
+    }
+    if reverse:
+        payload['r'] = 1
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Inverse of encode_cursor, returns (position, reverse).
+    Any tampering with the token ends up as a 404 like DRF's own
+    CursorPagination does.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        position = payload['p']
+        if not isinstance(position, list):
+            raise ValueError
+        return position, bool(payload.get('r'))
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise NotFound(_("Invalid cursor"))
+
+
+def keyset_filter(ordering, position, reverse=False):
+    """
+    Build the "comes after position" condition for a lexicographic
+    ordering like ('-created', '-pk'):
+
+        created < c OR (created = c AND pk < p)
+
+    With reverse=True the comparisons flip so we can walk backwards
+    from the position.
+    """
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, position):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending != reverse else 'gt'
+        condition |= equal_so_far & Q(**{'{}__{}'.format(name, lookup): value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+class KeysetPagination:
+    """
+    Seek based pagination over a unique ordering, by default
+    newest first on (created, pk). Each page is a single
+    "WHERE (created, pk) < (c, p) ORDER BY ... LIMIT n + 1" so there
+    is no COUNT(*) and no OFFSET scan however deep the client goes.
+    The previous/next links carry an opaque cursor.
+    """
+    ordering = ('-created', '-pk')
+
+    def __init__(self, page_size, cursor_query_param='cursor', ordering=None):
+        self.page_size = page_size
+        self.cursor_query_param = cursor_query_param
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.has_next = False
+        self.has_previous = False
+        self.page = []
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def clean_position(self, queryset, position):
+        """
+        Cast the json values of a decoded cursor back to python
+        values through the model fields, e.g. iso strings to datetimes.
+        """
+        if len(position) != len(self.ordering):
+            raise NotFound(_("Invalid cursor"))
+        opts = queryset.model._meta
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            model_field = opts.pk if name == 'pk' else opts.get_field(name)
+            try:
+                cleaned.append(model_field.to_python(value))
+            except Exception:
+                raise NotFound(_("Invalid cursor"))
+        return cleaned
+
+    def paginate_queryset(self, queryset, request):
+        self.base_url = request.build_absolute_uri()
+        token = request.query_params.get(self.cursor_query_param)
+        position, reverse = (None, False)
+        if token:
+            position, reverse = decode_cursor(token)
+            position = self.clean_position(queryset, position)
+
+        if reverse:
+            ordering = [f.lstrip('-') if f.startswith('-') else '-' + f
+                        for f in self.ordering]
+        else:
+            ordering = list(self.ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                keyset_filter(self.ordering, position, reverse)
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        token = encode_cursor(self.get_position(self.page[-1]))
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        token = encode_cursor(self.get_position(self.page[0]), reverse=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+
+class FeedPagination(PageNumberPagination):
+    """
+    Page number pagination that can switch to keyset pagination.
+
+    By default nothing changes for existing clients: ?page=N with
+    a total count. Passing ?pagination=cursor switches to the keyset
+    mode, where pages come from an opaque ?cursor= token, there is no
+    count query and a client can pick ?page_size= up to max_page_size.
+    The cursor mode is ordered by cursor_ordering (newest first),
+    a view can override it with a `cursor_ordering` attribute.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-created', '-pk')
+
+    keyset = None
+
+    def use_cursor_mode(self, request, queryset):
+        if request.query_params.get(self.mode_query_param) != self.cursor_mode:
+            return False
+        # Models without a created column (e.g. users) stay page numbered
+        opts = queryset.model._meta
+        fields = {f.name for f in opts.get_fields()}
+        return all(
+            f.lstrip('-') == 'pk' or f.lstrip('-') in fields
+            for f in self.cursor_ordering
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            self.cursor_ordering = tuple(ordering)
+        if not self.use_cursor_mode(request, queryset):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.keyset = KeysetPagination(
+            self.get_page_size(request),
+            cursor_query_param=self.cursor_query_param,
+            ordering=self.cursor_ordering,
+        )
+        return self.keyset.paginate_queryset(queryset, request)
+
+    def get_paginated_response(self, data):
+        if self.keyset is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.keyset.get_next_link(),
+            'previous': self.keyset.get_previous_link(),
+            'results': data,
+        })
+
+    def get_cursor_link(self, url, instance):
+        """
+        Link to the keyset page that follows `instance`, for responses
+        that embed the first page of a feed and hand the rest over to
+        the feed's own list view.
+        """
+        url = replace_query_param(url, self.mode_query_param, self.cursor_mode)
+        position = KeysetPagination(
+            self.page_size, ordering=self.cursor_ordering
+        ).get_position(instance)
+        return replace_query_param(
+            url, self.cursor_query_param, encode_cursor(position)
+        )